@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from db_config import CountyOverviewCheckpointTable
+
+logger = logging.getLogger("county_overview")
+
+# Batch keeps AWS_BATCH_JOB_ID across retry attempts, so a retry resumes the same run
+RUN_ID = os.getenv("CHECKPOINT_RUN_ID") or os.getenv("AWS_BATCH_JOB_ID") or date.today().isoformat()
+
+WHOLE_WINDOW = 0
+# Holds the window's total case count when its pages were fetched, in case_count
+WINDOW_TOTAL = -1
+
+
+class CountyCheckpoint:
+    """Tracks which date windows and result pages of one county are already persisted.
+
+    Completed work is loaded from county_overview_checkpoint when the county starts;
+    new marks are kept in memory and only written by save(), which the caller runs
+    once the county's export has been uploaded. Without a session nothing is loaded
+    or saved.
+
+    Page marks are only valid while the window still holds the same cases, since a
+    new filing shifts results across page boundaries. The window's total is stored
+    with its pages, and forget_pages() drops them when the total has changed.
+    """
+
+    def __init__(self, county, session=None, run_id=RUN_ID):
+        self.county = county
+        self.session = session
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self.done = set()
+        self.totals = {}
+        self.pending = {}
+        self.forgotten = set()
+        if session is not None:
+            table = CountyOverviewCheckpointTable.__table__
+            rows = session.execute(
+                select(table.c.window_start, table.c.window_end, table.c.page, table.c.case_count)
+                .where(table.c.run_id == run_id, table.c.county == county)
+            )
+            for window_start, window_end, page, case_count in rows:
+                self.done.add((window_start, window_end, page))
+                if page == WINDOW_TOTAL:
+                    self.totals[(window_start, window_end)] = case_count
+            if self.done:
+                logger.info(f"Resuming {county}: {len(self.done)} windows/pages already done in run {run_id}")
+
+    @property
+    def resumed(self):
+        return bool(self.done)
+
+    def _is_done(self, key):
+        with self._lock:
+            return key in self.done or key in self.pending
+
+    def window_done(self, start_date, end_date):
+        return self._is_done((start_date, end_date, WHOLE_WINDOW))
+
+    def page_done(self, start_date, end_date, page):
+        return self._is_done((start_date, end_date, page))
+
+    def mark_page(self, start_date, end_date, page, case_count):
+        with self._lock:
+            self.pending[(start_date, end_date, page)] = case_count
+
+    def mark_window(self, start_date, end_date):
+        self.mark_page(start_date, end_date, WHOLE_WINDOW, 0)
+
+    def has_pages(self, start_date, end_date):
+        with self._lock:
+            return any(
+                key[:2] == (start_date, end_date) and key[2] > WHOLE_WINDOW
+                for key in list(self.done) + list(self.pending)
+            )
+
+    def window_total(self, start_date, end_date):
+        """Total case count the window had when its pages were fetched, or None"""
+        with self._lock:
+            return self.totals.get((start_date, end_date))
+
+    def mark_total(self, start_date, end_date, total):
+        with self._lock:
+            self.totals[(start_date, end_date)] = total
+            self.pending[(start_date, end_date, WINDOW_TOTAL)] = total
+
+    def forget_pages(self, start_date, end_date):
+        """Drops the window's page marks and total, here and (on save) in the table"""
+        window = (start_date, end_date)
+        with self._lock:
+            self.done = {key for key in self.done if key[:2] != window}
+            self.pending = {key: count for key, count in self.pending.items() if key[:2] != window}
+            self.totals.pop(window, None)
+            self.forgotten.add(window)
+
+    def save(self):
+        """Writes pending marks and drops forgotten windows; safe to repeat."""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+            forgotten, self.forgotten = self.forgotten, set()
+        if self.session is None or not (pending or forgotten):
+            self.done.update(pending)
+            return
+        rows = [
+            {
+                "run_id": self.run_id,
+                "county": self.county,
+                "window_start": window_start,
+                "window_end": window_end,
+                "page": page,
+                "case_count": case_count,
+                "completed_at": datetime.utcnow(),
+            }
+            for (window_start, window_end, page), case_count in pending.items()
+        ]
+        table = CountyOverviewCheckpointTable.__table__
+        try:
+            if forgotten:
+                self.session.execute(delete(table).where(
+                    table.c.run_id == self.run_id, table.c.county == self.county,
+                    or_(*(and_(table.c.window_start == window_start, table.c.window_end == window_end)
+                          for window_start, window_end in forgotten)),
+                ))
+            if rows:
+                stmt = insert(table).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.run_id, table.c.county, table.c.window_start, table.c.window_end, table.c.page],
+                    set_={"case_count": stmt.excluded.case_count, "completed_at": stmt.excluded.completed_at},
+                )
+                self.session.execute(stmt)
+            self.session.commit()
+            self.done.update(pending)
+            logger.info(f"Checkpointed {len(rows)} windows/pages for {self.county}")
+        except Exception:
+            self.session.rollback()
+            with self._lock:
+                self.pending.update(pending)
+                self.forgotten.update(forgotten)
+            raise
@@ -7,13 +7,25 @@ import pandas as pd
 from datetime import date, datetime,timedelta
 import re
 import logging
+import threading
 import logging.handlers
 import io
-from db_config import get_db_connection, CaseInTakeTable, get_secret
+import uuid
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from sqlalchemy import select, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from db_config import get_db_connection, CaseInTakeTable, get_secret, case_number_index_ready
+from http_client import create_http_session, MAX_REQUESTS_PER_HOST
+from token_provider import BearerTokenProvider
+import pyarrow as pa
+from s3_writers import JsonLinesWriter, XlsxStreamWriter, ParquetStreamWriter
+from checkpoints import CountyCheckpoint
 
 # Configure logging
 log_filename = f"county_overview_{date.today().strftime('%Y%m%d')}.log"
-logger = logging.getLogger(__name__)
+# Named so the helper modules' loggers share these handlers when run as a script
+logger = logging.getLogger("county_overview")
 logger.setLevel(logging.INFO)
 
 # Formatter for log messages
@@ -30,7 +42,6 @@ memory_handler.setFormatter(formatter)
 logger.addHandler(memory_handler)
 
 # Global variables
-bearer_token_data = {"token": None, "expires_at": 0}
 COUNTY_JSON_PATH = "county_info.json"
 
 AWS_REGION = "us-east-1"
@@ -45,6 +56,15 @@ CASE_TYPES = ["CVFCV", "CVFM", "FORSP"]
 ALLOWED_CASE_PREFIXES = {"CV", "SP", "M"}
 # EXCLUDE_FORSP_COUNTIES = {"Mecklenburg County", "Wake County", "Cabarrus County"}
 INCLUDE_FORSP_COUNTIES = {"Mecklenburg County", "Union County", "Cabarrus County"}
+# Counties and cached result pages fetched at once; MAX_REQUESTS_PER_HOST caps the total
+COUNTY_CONCURRENCY = int(os.getenv("COUNTY_CONCURRENCY", "4"))
+PAGE_CONCURRENCY = int(os.getenv("PAGE_CONCURRENCY", str(MAX_REQUESTS_PER_HOST)))
+# Windows with more result pages than this are split in half by filing date
+MAX_PAGES_PER_WINDOW = int(os.getenv("MAX_PAGES_PER_WINDOW", "50"))
+# Date windows of one county fetched at once, however deep the splitting goes
+WINDOW_CONCURRENCY = int(os.getenv("WINDOW_CONCURRENCY", "2"))
+CASE_INSERT_BATCH_SIZE = 1000
+COMPRESS_JSONL = os.getenv("COMPRESS_JSONL", "false").lower() == "true"
 
 secret_Arn = "arn:aws:secretsmanager:us-east-1:491085409841:secret:Vivid-pasword-store-8aMVod"
 # Default dates: end date is today, start date is yesterday
@@ -56,11 +76,120 @@ start_date_str = os.getenv("START_DATE", "06/17/2025")
 end_date_str = os.getenv("END_DATE", "06/26/2025")
 
 
-def fetch_cases_by_date_range(county, odyssey, county_node_ids, bearer_token, start_date, end_date, session):
-    """Fetch cases for a given county using date range and countyNodeIDs."""
+def fetch_cache_page(token_provider, headers, cache_key, page, county):
+    """Fetch one cached result page; returns None if the page fails."""
+    cache_params = {"cacheKey": cache_key, "page": str(page)}
     try:
-        headers = {"Authorization": f"Bearer {bearer_token}", "Content-Type": "application/json"}
-        all_cases = []
+        response = token_provider.get(BASE_URL, headers=headers, params=cache_params, timeout=30)
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch page {page} for {county}: {response.status_code} - {response.text}")
+            return None
+        page_data = response.json().get("cases", [])
+        logger.info(f"Fetched {len(page_data)} cases for {county} on page {page}")
+        for case in page_data:
+            case["county"] = county
+        return page_data
+    except requests.exceptions.JSONDecodeError as json_err:
+        logger.error(f"JSON decode error on page {page} for {county}: {str(json_err)}")
+        return None
+    except Exception as page_err:
+        logger.error(f"Error fetching page {page} for {county}: {str(page_err)}")
+        return None
+
+class WindowTooLarge(Exception):
+    """The API timed out, or returned more pages than one window should hold."""
+
+def fetch_cases_by_date_range(county, odyssey, county_node_ids, token_provider, start_date, end_date, on_page, checkpoint=None):
+    """Fetch cases for a given county using date range and countyNodeIDs.
+
+    The range is split into smaller date windows whenever the API times out or a
+    window has more than MAX_PAGES_PER_WINDOW pages, and sub-windows are fetched
+    WINDOW_CONCURRENCY at a time. Pages are handed to ``on_page`` as they arrive, deduplicated by
+    caseNumber across windows. Windows and pages already marked in ``checkpoint``
+    are skipped, and newly fetched ones are marked on it. Returns the number of
+    cases fetched.
+    """
+    checkpoint = checkpoint or CountyCheckpoint(county)
+    lock = threading.Lock()
+    seen_case_numbers = set()
+
+    def emit(page_data):
+        # Windows run in their own threads, but on_page writes to one ORM session
+        with lock:
+            fresh = []
+            for case in page_data:
+                case_number = case.get("caseNumber")
+                if case_number in seen_case_numbers:
+                    continue
+                if case_number:
+                    seen_case_numbers.add(case_number)
+                fresh.append(case)
+            if fresh:
+                on_page(fresh)
+            return len(fresh)
+
+    try:
+        case_count = fetch_windows(county, county_node_ids, token_provider, start_date, end_date, emit, checkpoint)
+        if not case_count:
+            logger.info(f"No cases found for {county} from {start_date} to {end_date}")
+        return case_count
+    except Exception as e:
+        logger.error(f"Error in fetch_cases_by_date_range for {county}: {str(e)}")
+        raise
+
+def fetch_windows(county, county_node_ids, token_provider, start_date, end_date, emit, checkpoint):
+    """Fetch a date range on one bounded executor, halving any window that is too large.
+
+    The halves of a split window are queued on the same executor instead of a pool
+    of their own, so the thread count stays at WINDOW_CONCURRENCY.
+    """
+    case_count = 0
+    splits = []
+    with ThreadPoolExecutor(max_workers=max(1, WINDOW_CONCURRENCY)) as executor:
+        def submit(window_start, window_end):
+            return executor.submit(fetch_window, county, county_node_ids, token_provider, window_start, window_end, emit, checkpoint)
+
+        pending = {submit(start_date, end_date): (start_date, end_date)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                window_start, window_end = pending.pop(future)
+                try:
+                    case_count += future.result()
+                except WindowTooLarge as reason:
+                    if window_start >= window_end:
+                        for other in pending:
+                            other.cancel()
+                        raise Exception(f"{reason} for {county} on single-day window {window_start}. Exiting script.")
+                    mid_date = window_start + timedelta(days=(window_end - window_start).days // 2)
+                    windows = [(window_start, mid_date), (mid_date + timedelta(days=1), window_end)]
+                    logger.info(f"{reason} for {county} from {window_start} to {window_end}; splitting into {windows[0][0]}-{windows[0][1]} and {windows[1][0]}-{windows[1][1]}")
+                    splits.append((window_start, window_end, windows))
+                    for window in windows:
+                        pending[submit(*window)] = window
+                except Exception:
+                    for other in pending:
+                        other.cancel()
+                    raise
+
+    # Deepest splits first, so a fully fetched window marks its parents in turn
+    for window_start, window_end, windows in reversed(splits):
+        if all(checkpoint.window_done(half_start, half_end) for half_start, half_end in windows):
+            checkpoint.mark_window(window_start, window_end)
+    return case_count
+
+def fetch_window(county, county_node_ids, token_provider, start_date, end_date, emit, checkpoint):
+    """Fetch one date window unless the checkpoint already has it; raises WindowTooLarge if it must be split."""
+    if checkpoint.window_done(start_date, end_date):
+        logger.info(f"Skipping {county} from {start_date} to {end_date}: already fetched in run {checkpoint.run_id}")
+        return 0
+    return fetch_date_window(county, county_node_ids, token_provider, start_date, end_date, emit, checkpoint)
+
+def fetch_date_window(county, county_node_ids, token_provider, start_date, end_date, emit, checkpoint):
+    """Fetch every page of one date window; raises WindowTooLarge instead of fetching an oversized window."""
+    try:
+        headers = {"Content-Type": "application/json"}
+        case_count = 0
 
         params = {
             "page": "1",
@@ -78,21 +207,22 @@ def fetch_cases_by_date_range(county, odyssey, county_node_ids, bearer_token, st
             prepared_request = requests.Request('GET', BASE_URL, headers=headers, params=params).prepare()
             logger.info(f"Debug: API request URL: {prepared_request.url}")
 
-            response = requests.get(BASE_URL, headers=headers, params=params, timeout=30)
+            response = token_provider.get(BASE_URL, headers=headers, params=params, timeout=30)
             if response.status_code == 504:
-                raise Exception(f"504 Gateway Time-out for {county} in initial API call. Exiting script.")
+                raise WindowTooLarge("504 Gateway Time-out")
             if response.status_code == 404:
                 try:
                     error_data = response.json()
                     if error_data.get("status") == 404 and error_data.get("message") == "No cases were found with the search criteria.":
                         logger.info(f"API returned 404: No cases exist for {county} from {start_date} to {end_date}.")
-                        return all_cases
+                        checkpoint.mark_window(start_date, end_date)
+                        return case_count
                 except ValueError:
                     logger.info(f"Non-JSON 404 response for {county}: {response.text}")
-                    return all_cases
+                    return case_count
             elif response.status_code != 200:
                 logger.error(f"Error fetching cases for {county}: {response.status_code} - {response.text}")
-                return all_cases
+                return case_count
 
             response_headers = response.headers
             link_header = response_headers.get("Link", "")
@@ -100,109 +230,133 @@ def fetch_cases_by_date_range(county, odyssey, county_node_ids, bearer_token, st
             cache_key = cache_key_match.group(1) if cache_key_match else None
             last_page_match = re.search(r'page=(\d+)>;rel="last"', link_header)
             last_page = int(last_page_match.group(1)) if last_page_match else 1
+            if last_page > MAX_PAGES_PER_WINDOW and start_date < end_date:
+                raise WindowTooLarge(f"{last_page} result pages")
 
-            cases_data = []
             if cache_key:
-                for page in range(1, last_page + 1):
-                    cache_params = {"cacheKey": cache_key, "page": str(page)}
-                    cache_url = f"{BASE_URL}"
-                    try:
-                        response = requests.get(cache_url, headers=headers, params=cache_params, timeout=30)
-                        if response.status_code != 200:
-                            logger.error(f"Failed to fetch page {page} for {county}: {response.status_code} - {response.text}")
+                # Fetched up front to size the window; reused when its turn comes
+                prefetched = {}
+                first_page = response.json().get("cases", [])
+                prefetched[last_page] = fetch_cache_page(token_provider, headers, cache_key, last_page, county)
+                total = None
+                if prefetched[last_page] is not None:
+                    total = (last_page - 1) * len(first_page) + len(prefetched[last_page])
+                if checkpoint.has_pages(start_date, end_date) and (total is None or total != checkpoint.window_total(start_date, end_date)):
+                    logger.info(f"{county} from {start_date} to {end_date} now has {total} cases, not {checkpoint.window_total(start_date, end_date)}; refetching all its pages")
+                    checkpoint.forget_pages(start_date, end_date)
+                if total is not None:
+                    checkpoint.mark_total(start_date, end_date, total)
+
+                missing_pages = [page for page in range(1, last_page + 1) if not checkpoint.page_done(start_date, end_date, page)]
+                if len(missing_pages) < last_page:
+                    logger.info(f"Skipping {last_page - len(missing_pages)} of {last_page} pages for {county} from {start_date} to {end_date}: already fetched")
+                failed_pages = 0
+                # Pages are fetched concurrently but handed on in page order
+                with ThreadPoolExecutor(max_workers=max(1, min(PAGE_CONCURRENCY, len(missing_pages)))) as executor:
+                    pages = executor.map(
+                        lambda page: prefetched.get(page) or fetch_cache_page(token_provider, headers, cache_key, page, county),
+                        missing_pages,
+                    )
+                    for page, page_data in zip(missing_pages, pages):
+                        if page_data is None:
+                            failed_pages += 1
                             continue
-                        page_data = response.json().get("cases", [])
-                        logger.info(f"Fetched {len(page_data)} cases for {county} on page {page}")
-                        for case in page_data:
-                            case["county"] = county
-                        cases_data.extend(page_data)
-                    except requests.exceptions.JSONDecodeError as json_err:
-                        logger.error(f"JSON decode error on page {page} for {county}: {str(json_err)}")
-                        continue
-                    except Exception as page_err:
-                        logger.error(f"Error fetching page {page} for {county}: {str(page_err)}")
-                        continue
+                        if page == last_page and total is None:
+                            total = (last_page - 1) * len(first_page) + len(page_data)
+                            checkpoint.mark_total(start_date, end_date, total)
+                        page_count = emit(page_data) if page_data else 0
+                        case_count += page_count
+                        checkpoint.mark_page(start_date, end_date, page, page_count)
+                if not failed_pages:
+                    checkpoint.mark_window(start_date, end_date)
             else:
                 try:
                     page_data = response.json().get("cases", [])
                     logger.info(f"Fetched {len(page_data)} cases for {county} (no pagination)")
                     for case in page_data:
                         case["county"] = county
-                    cases_data.extend(page_data)
+                    if page_data:
+                        case_count += emit(page_data)
+                    checkpoint.mark_window(start_date, end_date)
                 except requests.exceptions.JSONDecodeError as json_err:
                     logger.error(f"JSON decode error for {county} (no pagination): {str(json_err)}")
-                    return all_cases
+                    return case_count
 
-            if cases_data:
-                all_cases.extend(cases_data)
-            else:
-                logger.info(f"No cases found for {county} from {start_date} to {end_date}")
-
-            return all_cases
+            return case_count
 
         except requests.exceptions.Timeout:
-            raise Exception(f"Timeout occurred for {county} in initial API call. Exiting script.")
+            raise WindowTooLarge("Timeout")
+        except WindowTooLarge:
+            raise
         except requests.RequestException as req_err:
             logger.error(f"Request error for {county}: {str(req_err)}")
-            return all_cases
+            return case_count
         except Exception as e:
             logger.error(f"Unexpected error fetching cases for {county}: {str(e)}")
-            return all_cases
+            return case_count
 
+    except WindowTooLarge:
+        raise
     except Exception as e:
-        logger.error(f"Error in fetch_cases_by_date_range for {county}: {str(e)}")
+        logger.error(f"Error in fetch_date_window for {county}: {str(e)}")
         raise
 
-def save_cases_to_rds(cases_data, session):
-    """Loads cases and saves only PEND status cases with CV, SP, or M prefixes to RDS."""
-    try:
-        filtered_cases = 0
-        for case in cases_data:
-            try:
-                case_number = case.get("caseNumber", "")
-                prefix_match = re.match(r"(\d{2})(\w+?)\d+-\d+", case_number)
-                if not prefix_match:
-                    logger.info(f"Skipping case {case_number} due to invalid caseNumber format")
-                    continue
-                year, prefix = prefix_match.groups()
-                if prefix not in ALLOWED_CASE_PREFIXES:
-                    logger.info(f"Skipping case {case_number} with unallowed prefix {prefix} (allowed: CV, SP, M)")
-                    continue
-                if year != "25":
-                    logger.info(f"Skipping case {case_number} from year 20{year} (only 2025 cases allowed)")
-                    continue
-
-                if case.get("caseStatus") != "PEND":
-                    logger.info(f"Skipping case {case_number} with status {case.get('caseStatus', 'unknown')} (only PEND cases saved)")
-                    continue
+CASE_FIELDS = ["caseNumber", "caseStatus", "caseStyle", "caseType", "nodeID", "county"]
+# Anchored like re.match: two-digit year, letter prefix, then the sequence and county suffix
+CASE_NUMBER_PATTERN = r"^(?P<year>\d{2})(?P<prefix>\w+?)\d+-\d+"
+
+# Applied in order; a case is counted under the first filter it fails
+CASE_FILTERS = [
+    ("invalid caseNumber format", lambda df: df["prefix"].notna()),
+    ("prefix not in CV, SP, M", lambda df: df["prefix"].isin(ALLOWED_CASE_PREFIXES)),
+    ("not a 2025 case", lambda df: df["year"] == "25"),
+    ("status not PEND", lambda df: df["caseStatus"] == "PEND"),
+    ("caseStyle contains (HOA)", lambda df: ~df["caseStyle"].fillna("").astype(str).str.upper().str.contains("(HOA)", regex=False)),
+    ("missing required fields", lambda df: df[CASE_FIELDS].notna().all(axis=1)),
+]
+
+def filter_cases(cases_data):
+    """Runs CASE_FILTERS over a page of cases in one vectorized pass.
+
+    Returns the accepted cases as dicts and a Counter of rejections per filter.
+    """
+    rejected = Counter()
+    if not cases_data:
+        return [], rejected
+
+    df = pd.DataFrame(cases_data, columns=CASE_FIELDS, dtype=object)
+    df = df.join(df["caseNumber"].fillna("").astype(str).str.extract(CASE_NUMBER_PATTERN))
+
+    keep = pd.Series(True, index=df.index)
+    for reason, predicate in CASE_FILTERS:
+        failed = keep & ~predicate(df).fillna(False).astype(bool)
+        if failed.any():
+            rejected[reason] = int(failed.sum())
+        keep &= ~failed
+
+    return df.loc[keep, CASE_FIELDS].to_dict("records"), rejected
 
-                case_style = case.get("caseStyle", "").upper()
-                if "(HOA)" in case_style:
-                    logger.info(f"Skipping case {case_number} due to caseStyle containing '(HOA)'")
-                    continue
+def save_cases_to_rds(cases_data, session):
+    """Loads cases and saves only PEND status cases with CV, SP, or M prefixes to RDS.
 
-                existing_case = session.query(CaseInTakeTable).filter_by(case_number=case_number).first()
-                if existing_case:
-                    logger.info(f"Skipping case {case_number} as it already exists in the database")
-                    continue
+    Existing case_numbers are looked up with one ``= ANY(...)`` query and the new rows
+    are written with batched INSERT ... ON CONFLICT (case_number) DO NOTHING.
+    """
+    try:
+        accepted_cases, rejected = filter_cases(cases_data)
+        if rejected:
+            logger.info(f"Skipped {sum(rejected.values())} of {len(cases_data)} cases: {dict(rejected)}")
 
-                new_case = CaseInTakeTable(
-                    odyssey_id=int(str(case["caseNumber"])[-3:]),
-                    node_id=case["nodeID"],
-                    case_number=case_number,
-                    case_status=case["caseStatus"],
-                    case_style=case["caseStyle"],
-                    case_type=case["caseType"],
-                    county=case["county"]
-                )
-                session.add(new_case)
-                filtered_cases += 1
+        new_cases = {}
+        for case in accepted_cases:
+            try:
+                new_cases[case["caseNumber"]] = case_intake_row(case)
             except Exception as case_err:
                 logger.error(f"Error processing case {case.get('caseNumber', 'unknown')}: {str(case_err)}")
                 continue
 
+        filtered_cases = insert_case_intake_rows(session, list(new_cases.values()))
         if filtered_cases > 0:
-            session.commit()
             logger.info(f"Cases saved to AWS RDS in vivid-dev-schema! {filtered_cases} PEND  cases processed.")
         else:
             logger.info("No PEND cases with CV, SP, or M prefixes found to save to RDS.")
@@ -211,58 +365,44 @@ def save_cases_to_rds(cases_data, session):
         logger.error(f"Error in save_cases_to_rds: {str(e)}")
         raise
 
-def validate_bearer_token():
-    """Validate and return a valid bearer token."""
-    global bearer_token_data
-    try:
-        current_time = int(time.time())
-        if bearer_token_data["token"] and current_time <= bearer_token_data["expires_at"]:
-            logger.info("Using existing valid bearer token.")
-            return bearer_token_data["token"]
-        
-        logger.info("Bearer token expired or missing. Generating a new one.")
-        new_token, new_expiry = generate_new_token()
-        
-        if new_token:
-            bearer_token_data["token"] = new_token
-            bearer_token_data["expires_at"] = new_expiry
-            return new_token
-        else:
-            logger.error("Failed to generate new token.")
-            return None
-    except Exception as e:
-        logger.error(f"Error in validate_bearer_token: {str(e)}")
-        return None
-
-def generate_new_token():
-    """Generate a new bearer token."""
-    try:
-        url = "https://prdaws.nccourts.org/authentication_proxy/api/v1/authorize"
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        ENCODED_EMAIL, ENCODED_PASSWORD = get_secret(secret_Arn)
-        if not ENCODED_EMAIL or not ENCODED_PASSWORD:
-            raise ValueError("Failed to retrieve credentials from Secrets Manager")
-        
-        data = {
-            "appClientId": APP_CLIENT_ID,
-            "tokenScope": TOKEN_SCOPE,
-            "userEmailAddress": ENCODED_EMAIL,
-            "userPassword": ENCODED_PASSWORD,
-        }
-
-        response = requests.post(url, headers=headers, data=data)
-        if response.status_code == 200:
-            token_data = response.json()
-            new_token = token_data["accessToken"]
-            new_expiry = int(time.time()) + 300
-            logger.info("New token generated successfully.")
-            return new_token, new_expiry
-        else:
-            logger.error(f"Failed to get new token: {response.text}")
-            return None, None
-    except Exception as e:
-        logger.error(f"Error in generate_new_token: {str(e)}")
-        return None, None
+def case_intake_row(case):
+    return {
+        "id": str(uuid.uuid4()),
+        "odyssey_id": int(str(case["caseNumber"])[-3:]),
+        "node_id": case["nodeID"],
+        "case_number": case["caseNumber"],
+        "case_status": case["caseStatus"],
+        "case_style": case["caseStyle"],
+        "case_type": case["caseType"],
+        "county": case["county"],
+        "created_at": datetime.utcnow(),
+    }
+
+def insert_case_intake_rows(session, rows):
+    """Inserts case_intake rows whose case_number is not stored yet; returns how many were new."""
+    if not rows:
+        return 0
+
+    case_numbers = [row["case_number"] for row in rows]
+    existing = set(session.execute(
+        select(CaseInTakeTable.case_number).where(
+            CaseInTakeTable.case_number == any_(bindparam("case_numbers", case_numbers, type_=ARRAY(String)))
+        )
+    ).scalars())
+    if existing:
+        logger.info(f"Skipping {len(existing)} cases that already exist in the database")
+    rows = [row for row in rows if row["case_number"] not in existing]
+
+    inserted = 0
+    for start in range(0, len(rows), CASE_INSERT_BATCH_SIZE):
+        batch = rows[start:start + CASE_INSERT_BATCH_SIZE]
+        stmt = insert(CaseInTakeTable).values(batch)
+        if case_number_index_ready():
+            # Guards against a concurrent writer inserting the same case since the lookup
+            stmt = stmt.on_conflict_do_nothing(index_elements=["case_number"])
+        inserted += session.execute(stmt).rowcount
+    session.commit()
+    return inserted
 
 def load_county_data():
     """Load county data including county, odyssey, and codes from a JSON file."""
@@ -280,7 +420,7 @@ def load_county_data():
         logger.error(f"Error in load_county_data: {str(e)}")
         return []
 
-def fetch_cases_for_county(county, odyssey, county_node_ids, bearer_token, session):
+def fetch_cases_for_county(county, odyssey, county_node_ids, token_provider, session):
     """Fetch cases for a given county using a date range from environment variables."""
     try:
         results = []
@@ -297,11 +437,31 @@ def fetch_cases_for_county(county, odyssey, county_node_ids, bearer_token, sessi
             start_date = datetime.strptime("04/01/2025", "%m/%d/%Y").date()
             end_date = datetime.strptime("05/13/2025", "%m/%d/%Y").date()
 
-        cases_data = fetch_cases_by_date_range(county, odyssey, county_node_ids, bearer_token, start_date, end_date, session)
-        if cases_data:
-            result = upload_to_s3(cases_data, county, odyssey, start_date, end_date, session)
+        checkpoint = CountyCheckpoint(county, session)
+        if checkpoint.window_done(start_date, end_date):
+            logger.info(f"Skipping {county}: already completed in run {checkpoint.run_id}")
+            return {"status": "Already completed"}
+
+        export = CountyExport(county, odyssey, start_date, end_date, session, resumed=checkpoint.resumed)
+        try:
+            case_count = fetch_cases_by_date_range(
+                county, odyssey, county_node_ids, token_provider, start_date, end_date, export.add_page, checkpoint
+            )
+        except Exception:
+            # Keep what was fetched so the next attempt only asks for the rest
+            if export.case_count and export.close()["status"] == "Success":
+                checkpoint.save()
+            else:
+                export.abort()
+            raise
+        if case_count:
+            result = export.close()
+            if result["status"] == "Success":
+                checkpoint.save()
             results.append(result)
         else:
+            export.abort()
+            checkpoint.save()
             logger.info(f"No cases found for {county} from {start_date} to {end_date}")
 
         return results if results else {"status": "No new data fetched"}
@@ -309,95 +469,172 @@ def fetch_cases_for_county(county, odyssey, county_node_ids, bearer_token, sessi
         logger.error(f"Error in fetch_cases_for_county for {county}: {str(e)}")
         raise
 
-def upload_to_s3(data, county, odyssey, start_date, end_date, session):
-    """Uploads case data to S3 in both JSON and Excel formats."""
+CASE_ROW_COLUMNS = ["nodeID", "caseNumber", "caseStyle", "caseType", "caseSecurityGroup", "charges", "county"]
+
+def case_row(case):
+    return {
+        "nodeID": case.get("nodeID", ""),
+        "caseNumber": case.get("caseNumber", ""),
+        "caseStyle": case.get("caseStyle", ""),
+        "caseType": case.get("caseType", ""),
+        "caseSecurityGroup": case.get("caseSecurityGroup", ""),
+        "charges": json.dumps(case.get("charges", [])),
+        "county": case.get("county", ""),
+    }
+
+# Columnar copy of case_row plus status and filing metadata, for queries across days and counties
+CASE_PARQUET_SCHEMA = pa.schema([
+    ("nodeID", pa.int64()),
+    ("caseNumber", pa.string()),
+    ("caseStyle", pa.string()),
+    ("caseType", pa.string()),
+    ("caseSecurityGroup", pa.string()),
+    ("charges", pa.string()),
+    ("county", pa.string()),
+    ("caseStatus", pa.string()),
+    ("caseFiledDate", pa.string()),
+    ("filedWindowStart", pa.date32()),
+    ("filedWindowEnd", pa.date32()),
+])
+
+def case_parquet_row(case, start_date, end_date):
+    row = case_row(case)
     try:
+        row["nodeID"] = int(row["nodeID"])
+    except (TypeError, ValueError):
+        row["nodeID"] = None
+    row["caseStatus"] = case.get("caseStatus")
+    row["caseFiledDate"] = case.get("caseFiledDate")
+    row["filedWindowStart"] = start_date
+    row["filedWindowEnd"] = end_date
+    return row
+
+class CountyExport:
+    """Streams one county's cases to RDS, S3 JSON Lines, Excel and Parquet page by page.
+
+    The JSON Lines file goes up through S3 multipart as it grows (gzip-compressed when
+    COMPRESS_JSONL is set), and the spreadsheet is written in constant-memory mode,
+    so memory use does not grow with the size of the county. The Parquet file lands
+    under county_overview/parquet/date=YYYY-MM-DD/odyssey=<id>/ so it can be read as
+    one dataset partitioned by pull date and odyssey id.
+    """
+
+    def __init__(self, county, odyssey, start_date, end_date, session, resumed=False):
+        self.county = county
+        self.session = session
+        self.start_date = start_date
+        self.end_date = end_date
         formatted_date = date.today().strftime("%Y_%m_%d")
         start_date_str = start_date.strftime("%Y%m%d")
         end_date_str = end_date.strftime("%Y%m%d")
         folder_path = f"county_overview/{formatted_date}/{odyssey}/"
-        json_filename = f"{folder_path}{odyssey}_{formatted_date}_county_overview_CV_CASES_{start_date_str}_{end_date_str}.json"
-        xlsx_filename = f"{folder_path}{odyssey}_{formatted_date}_county_overview_CV_CASES_{start_date_str}_{end_date_str}.xlsx"
-
+        base_filename = f"{folder_path}{odyssey}_{formatted_date}_county_overview_CV_CASES_{start_date_str}_{end_date_str}"
+        if resumed:
+            # Earlier attempts already uploaded their part under the plain name
+            base_filename += f"_resumed_{datetime.now().strftime('%H%M%S')}"
+        self.json_filename = f"{base_filename}.jsonl.gz" if COMPRESS_JSONL else f"{base_filename}.jsonl"
+        self.xlsx_filename = f"{base_filename}.xlsx"
+        parquet_folder = f"county_overview/parquet/date={date.today().isoformat()}/odyssey={odyssey}/"
+        self.parquet_filename = f"{parquet_folder}{base_filename[len(folder_path):]}.parquet"
+
+        self.json_writer = JsonLinesWriter(s3_client, BUCKET_NAME, self.json_filename, compress=COMPRESS_JSONL)
+        self.xlsx_writer = XlsxStreamWriter(s3_client, BUCKET_NAME, self.xlsx_filename, CASE_ROW_COLUMNS)
+        self.parquet_writer = ParquetStreamWriter(s3_client, BUCKET_NAME, self.parquet_filename, CASE_PARQUET_SCHEMA)
+        self.case_count = 0
+        self.error = None
+
+    def add_page(self, cases):
+        if self.error:
+            return
         try:
-            save_cases_to_rds(data, session)
-            # logger.info(f"Cases for {county} successfully saved as table")
-        except Exception as rds_err:
-            logger.error(f"Failed to save cases for {county} as table in RDS: {str(rds_err)}")
-            raise
-
-        json_data = json.dumps(data, indent=4)
-        s3_client.put_object(
-            Bucket=BUCKET_NAME,
-            Key=json_filename,
-            Body=json_data,
-            ContentType="application/json",
-        )
-        logger.info(f"Successfully uploaded JSON to S3: {json_filename}")
-
-        case_rows = []
-        for case in data:
             try:
-                base_info = {
-                    "nodeID": case.get("nodeID", ""),
-                    "caseNumber": case.get("caseNumber", ""),
-                    "caseStyle": case.get("caseStyle", ""),
-                    "caseType": case.get("caseType", ""),
-                    "caseSecurityGroup": case.get("caseSecurityGroup", ""),
-                    "charges": json.dumps(case.get("charges", [])),
-                    "county": case.get("county", ""),
-                }
-                case_rows.append(base_info)
-            except Exception as row_err:
-                logger.error(f"Error processing case row for {case.get('caseNumber', 'unknown')}: {str(row_err)}")
-                continue
-
-        df = pd.DataFrame(case_rows)
-        tmp_xlsx_path = f"/tmp/data_CV_CASES_{start_date_str}_{end_date_str}.xlsx"
-        with pd.ExcelWriter(tmp_xlsx_path, engine="xlsxwriter") as writer:
-            df.to_excel(writer, index=False, sheet_name="Cases")
+                save_cases_to_rds(cases, self.session)
+            except Exception as rds_err:
+                logger.error(f"Failed to save cases for {self.county} as table in RDS: {str(rds_err)}")
+                raise
+            self.json_writer.write(cases)
+            self.xlsx_writer.write(case_row(case) for case in cases)
+            self.parquet_writer.write(case_parquet_row(case, self.start_date, self.end_date) for case in cases)
+            self.case_count += len(cases)
+        except Exception as e:
+            logger.error(f"Error exporting cases for {self.county}: {str(e)}")
+            self.error = e
+            self.abort()
 
-        with open(tmp_xlsx_path, "rb") as f:
-            s3_client.put_object(
-                Bucket=BUCKET_NAME,
-                Key=xlsx_filename,
-                Body=f.read(),
-                ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-        logger.info(f"Successfully uploaded Excel to S3: {xlsx_filename}")
+    def close(self):
+        if self.error:
+            return {"status": "Failure", "error": str(self.error)}
+        try:
+            self.json_writer.close()
+            logger.info(f"Successfully uploaded JSON Lines to S3: {self.json_filename}")
+            self.xlsx_writer.close()
+            logger.info(f"Successfully uploaded Excel to S3: {self.xlsx_filename}")
+            self.parquet_writer.close()
+            logger.info(f"Successfully uploaded Parquet to S3: {self.parquet_filename}")
+            return {
+                "status": "Success",
+                "json_file": self.json_filename,
+                "xlsx_file": self.xlsx_filename,
+                "parquet_file": self.parquet_filename,
+                "cases": self.case_count,
+            }
+        except Exception as e:
+            logger.error(f"Error exporting cases for {self.county}: {str(e)}")
+            self.abort()
+            return {"status": "Failure", "error": str(e)}
 
-        return {"status": "Success", "json_file": json_filename, "xlsx_file": xlsx_filename}
-    except Exception as e:
-        logger.error(f"Error in upload_to_s3 for {county}: {str(e)}")
-        return {"status": "Failure", "error": str(e)}
+    def abort(self):
+        for writer in (self.json_writer, self.xlsx_writer, self.parquet_writer):
+            try:
+                writer.abort()
+            except Exception as abort_err:
+                logger.error(f"Error aborting upload for {self.county}: {str(abort_err)}")
 
 def county_overview():
     """Main function."""
-    global bearer_token_data
     try:
         engine, Session = get_db_connection()
-        session = Session()
         if not engine:
             logger.error("Error: Failed to establish database connection")
             return {"statusCode": 500, "body": "Database connection failed!"}
         
         logger.info("Scripts started execution.")
     
-        bearer_token = validate_bearer_token()
-        if not bearer_token:
-            logger.error("Error: Failed to obtain a valid bearer token.")
+        http_session = create_http_session()
+        token_provider = BearerTokenProvider(http_session, lambda: get_secret(secret_Arn), APP_CLIENT_ID, TOKEN_SCOPE)
+        try:
+            token_provider.get_token()
+        except Exception as token_err:
+            logger.error(f"Error: Failed to obtain a valid bearer token: {str(token_err)}")
             return {"statusCode": 401, "body": "Data fetching failed!"}
     
         counties = load_county_data()
         logger.info(f"Loaded {len(counties)} counties for processing.")
 
-        for county, odyssey, county_node_ids in counties:
+        def process_county(county, odyssey, county_node_ids):
+            # ORM sessions are not thread-safe, so each county gets its own
+            session = Session()
             try:
-                response = fetch_cases_for_county(county, odyssey, county_node_ids, bearer_token, session)
-                logger.info(f"Processed {county}: {response}")
-            except Exception as county_err:
-                logger.error(f"Error processing {county}: {str(county_err)}")
-                raise
+                return fetch_cases_for_county(county, odyssey, county_node_ids, token_provider, session)
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=max(1, COUNTY_CONCURRENCY)) as executor:
+            futures = {
+                executor.submit(process_county, county, odyssey, county_node_ids): county
+                for county, odyssey, county_node_ids in counties
+            }
+            for future in as_completed(futures):
+                county = futures[future]
+                try:
+                    response = future.result()
+                    logger.info(f"Processed {county}: {response}")
+                except Exception as county_err:
+                    logger.error(f"Error processing {county}: {str(county_err)}")
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+        http_session.close()
 
         logger.info("Scripts execution completed.")
 
@@ -424,7 +661,6 @@ def county_overview():
         return {"statusCode": 500, "body": "Internal server error."}
     finally:
         if 'engine' in locals() and engine:
-            session.close()
             engine.dispose()
             logger.info("Database connection closed.")
         memory_handler.flush()
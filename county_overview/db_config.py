@@ -1,11 +1,12 @@
 import uuid
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, JSON, MetaData, DateTime, text
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, JSON, MetaData, DateTime, Date, Index, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from datetime import datetime
 import boto3
 import json
 import base64
 import os
+import threading
 
 # Database Configuration
 RDS_HOST = os.getenv("RDS_HOST", "vivid-dev-database.ccn2i0geapl8.us-east-1.rds.amazonaws.com")
@@ -23,7 +24,7 @@ AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 session = boto3.Session(region_name=AWS_REGION)
 secrets_manager_session = session.client('secretsmanager')
 
-# Initialize DB Connection
+# Initialize DB Connection; the engine only connects on first use
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 meta_data = MetaData(schema=SCHEMA_NAME)
@@ -43,12 +44,58 @@ class CaseInTakeTable(Base):
     county = Column(String(100), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
-# Create tables in the schema
-Base.metadata.create_all(engine)
+CASE_NUMBER_INDEX = Index("ux_case_intake_case_number", CaseInTakeTable.case_number, unique=True)
+
+class CountyOverviewCheckpointTable(Base):
+    """Date windows and result pages of a county_overview run that are already persisted.
+
+    page 0 marks the whole window as done.
+    """
+    __tablename__ = "county_overview_checkpoint"
+    __table_args__ = {"schema": SCHEMA_NAME}
+
+    run_id = Column(String(100), primary_key=True)
+    county = Column(String(100), primary_key=True)
+    window_start = Column(Date, primary_key=True)
+    window_end = Column(Date, primary_key=True)
+    page = Column(Integer, primary_key=True)
+    case_count = Column(Integer, nullable=False, default=0)
+    completed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+_tables_lock = threading.Lock()
+_tables_ready = False
+
+def create_tables():
+    """Creates the tables in the schema on first use rather than at import, so modules
+    that only need the models (e.g. the load test's null sink) run without a database."""
+    global _tables_ready
+    with _tables_lock:
+        if not _tables_ready:
+            Base.metadata.create_all(engine)
+            _tables_ready = True
+
+_case_number_index_lock = threading.Lock()
+_case_number_index_ready = None
+
+def case_number_index_ready():
+    """Makes sure case_intake.case_number has its unique index. create_all skips tables
+    that already exist, so older deployments get the index here. Returns False if the
+    index can't be built, e.g. because duplicate case_numbers are already stored."""
+    global _case_number_index_ready
+    with _case_number_index_lock:
+        if _case_number_index_ready is None:
+            try:
+                CASE_NUMBER_INDEX.create(engine, checkfirst=True)
+                _case_number_index_ready = True
+            except Exception as e:
+                print(f"Error creating unique index on case_intake.case_number: {e}")
+                _case_number_index_ready = False
+        return _case_number_index_ready
 
 def get_db_connection():
     """Returns DB session and engine"""
     try:
+        create_tables()
         print("Connected to AWS RDS PostgreSQL!")
         return engine, SessionLocal
     except Exception as e:
@@ -0,0 +1,261 @@
+"""Local stand-in for the NC Courts authorize and partycases endpoints.
+
+Serves generated cases for any countyNodeID and filing-date range with the same
+Link/cacheKey pagination as prdaws.nccourts.org, so fetch_cases_by_date_range can be
+exercised without the real API:
+
+    python fake_nccourts_server.py --port 8089 --cases-per-day 40 --page-size 25
+    python fake_nccourts_server.py --max-window-days 7 --latency 0.2 --page-error-rate 0.01
+
+Point county_overview at it with
+AUTH_URL=http://127.0.0.1:8089/authentication_proxy/api/v1/authorize and
+BASE_URL=http://127.0.0.1:8089/rpa_web_services/api/v1/partycases/.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+AUTH_PATH = "/authentication_proxy/api/v1/authorize"
+PARTYCASES_PATH = "/rpa_web_services/api/v1/partycases/"
+NO_CASES_MESSAGE = "No cases were found with the search criteria."
+CASE_STATUSES = ["PEND", "PEND", "PEND", "DISP"]
+
+
+@dataclass
+class FakeCourtsConfig:
+    cases_per_day: int = 20          # per countyNodeID and case type
+    page_size: int = 100
+    max_window_days: int = 0         # initial queries spanning more days than this return 504; 0 disables
+    empty_every: int = 0             # every Nth countyNodeID has no cases, so its query returns 404; 0 disables
+    latency: float = 0.0             # seconds added to every response
+    jitter: float = 0.0              # up to this many extra seconds, uniformly random
+    page_error_rate: float = 0.0     # share of cached page requests answered with 500
+    token_ttl: int = 300
+    seed: int = 7
+
+
+class FakeCourtsState:
+    """Issued tokens, cached result sets and request counters, shared by handler threads"""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.result_sets = {}
+        self.counters = Counter()
+        self.rng = random.Random(config.seed)
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def issue_token(self):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = time.time() + self.config.token_ttl
+        return token
+
+    def token_valid(self, token):
+        with self.lock:
+            return self.tokens.get(token, 0) > time.time()
+
+    def store(self, cases):
+        cache_key = uuid.uuid4().hex
+        with self.lock:
+            self.result_sets[cache_key] = cases
+        return cache_key
+
+    def fetch(self, cache_key):
+        with self.lock:
+            return self.result_sets.get(cache_key)
+
+    def page_fails(self):
+        with self.lock:
+            return self.rng.random() < self.config.page_error_rate
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters)
+
+
+def odyssey_for_node(node_id):
+    # Node IDs embed the county number (101092000 -> 92), odyssey ids are county * 10 - 10
+    return node_id // 1000 % 1000 * 10 - 10
+
+
+def generate_cases(config, node_ids, case_types, start_date, end_date):
+    """Deterministic cases for every node, case type and filing day in the range"""
+    cases = []
+    day = start_date
+    while day <= end_date:
+        day_of_year = day.timetuple().tm_yday
+        for node_id in node_ids:
+            if config.empty_every and node_id % config.empty_every == 0:
+                continue
+            odyssey = odyssey_for_node(node_id)
+            for type_index, case_type in enumerate(case_types):
+                prefix = "SP" if case_type == "FORSP" else "CV"
+                for i in range(config.cases_per_day):
+                    sequence = (node_id % 1000) * 100000 + type_index * 10000 + i
+                    cases.append({
+                        "nodeID": node_id,
+                        "caseNumber": f"{day:%y}{prefix}{day_of_year:03d}{sequence:07d}-{odyssey:03d}",
+                        "caseStatus": CASE_STATUSES[i % len(CASE_STATUSES)],
+                        "caseStyle": f"PLAINTIFF {i} VS DEFENDANT {day_of_year}",
+                        "caseType": case_type,
+                        "caseSecurityGroup": "PUBLIC",
+                        "caseFiledDate": day.strftime("%m/%d/%Y"),
+                        "charges": [],
+                    })
+        day += timedelta(days=1)
+    return cases
+
+
+def make_handler(state):
+    config = state.config
+
+    class FakeCourtsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, body, headers=None):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+            state.count(f"status_{status}")
+
+        def delay(self):
+            if config.latency or config.jitter:
+                time.sleep(config.latency + state.rng.uniform(0, config.jitter))
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.delay()
+            if urlsplit(self.path).path != AUTH_PATH:
+                return self.send_json(404, {"status": 404, "message": "Not found"})
+            state.count("authorize")
+            self.send_json(200, {"accessToken": state.issue_token()})
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            self.delay()
+            if url.path != PARTYCASES_PATH:
+                return self.send_json(404, {"status": 404, "message": "Not found"})
+            token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            if not state.token_valid(token):
+                return self.send_json(401, {"status": 401, "message": "Unauthorized"})
+
+            params = parse_qs(url.query)
+            if "cacheKey" in params:
+                return self.send_page(params["cacheKey"][0], int(params.get("page", ["1"])[0]))
+            self.send_search(params)
+
+        def send_search(self, params):
+            state.count("searches")
+            start_date = datetime.strptime(params["caseFiledStartDate"][0], "%m/%d/%Y").date()
+            end_date = datetime.strptime(params["caseFiledEndDate"][0], "%m/%d/%Y").date()
+            if config.max_window_days and (end_date - start_date).days + 1 > config.max_window_days:
+                return self.send_json(504, {"status": 504, "message": "Gateway Time-out"})
+
+            node_ids = [int(node_id) for node_id in params.get("countyNodeID", [])]
+            cases = generate_cases(config, node_ids, params.get("caseType", []), start_date, end_date)
+            if not cases:
+                return self.send_json(404, {"status": 404, "message": NO_CASES_MESSAGE})
+            if len(cases) <= config.page_size:
+                state.count("cases_served", len(cases))
+                return self.send_json(200, {"cases": cases})
+
+            cache_key = state.store(cases)
+            last_page = -(-len(cases) // config.page_size)
+            base = f"http://{self.headers.get('Host')}{PARTYCASES_PATH}?cacheKey={cache_key}"
+            link = f'<{base}&page=2>;rel="next", <{base}&page={last_page}>;rel="last"'
+            state.count("cases_served", config.page_size)
+            self.send_json(200, {"cases": cases[:config.page_size]}, {"Link": link})
+
+        def send_page(self, cache_key, page):
+            state.count("pages")
+            cases = state.fetch(cache_key)
+            if cases is None:
+                return self.send_json(404, {"status": 404, "message": "Unknown cacheKey"})
+            if state.page_fails():
+                return self.send_json(500, {"status": 500, "message": "Internal Server Error"})
+            page_cases = cases[(page - 1) * config.page_size:page * config.page_size]
+            state.count("cases_served", len(page_cases))
+            self.send_json(200, {"cases": page_cases})
+
+    return FakeCourtsHandler
+
+
+def start_server(config, host="127.0.0.1", port=0):
+    """Serves in a daemon thread; returns (server, state, base_url) where base_url has no path"""
+    state = FakeCourtsState(config)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}"
+
+
+def add_config_arguments(parser):
+    defaults = FakeCourtsConfig()
+    parser.add_argument("--cases-per-day", type=int, default=defaults.cases_per_day,
+                        help="cases per countyNodeID, case type and filing day")
+    parser.add_argument("--page-size", type=int, default=defaults.page_size, help="cases per result page")
+    parser.add_argument("--max-window-days", type=int, default=defaults.max_window_days,
+                        help="answer 504 for searches spanning more days than this (0: never)")
+    parser.add_argument("--empty-every", type=int, default=defaults.empty_every,
+                        help="every Nth countyNodeID has no cases (0: none)")
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="up to this many extra random seconds")
+    parser.add_argument("--page-error-rate", type=float, default=defaults.page_error_rate,
+                        help="share of cached page requests that fail with 500")
+    parser.add_argument("--token-ttl", type=int, default=defaults.token_ttl, help="bearer token lifetime in seconds")
+
+
+def config_from_args(args):
+    return FakeCourtsConfig(
+        cases_per_day=args.cases_per_day,
+        page_size=args.page_size,
+        max_window_days=args.max_window_days,
+        empty_every=args.empty_every,
+        latency=args.latency,
+        jitter=args.jitter,
+        page_error_rate=args.page_error_rate,
+        token_ttl=args.token_ttl,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server, state, base_url = start_server(config_from_args(args), args.host, args.port)
+    print(f"AUTH_URL={base_url}{AUTH_PATH}")
+    print(f"BASE_URL={base_url}{PARTYCASES_PATH}")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(state.snapshot()))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Upper bound on in-flight requests to any one host, shared by every county and page thread
+MAX_REQUESTS_PER_HOST = int(os.getenv("MAX_REQUESTS_PER_HOST", "4"))
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+
+def _host_limit(url):
+    host = urlsplit(url).netloc
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(MAX_REQUESTS_PER_HOST)
+        return _host_limits[host]
+
+
+def create_http_session(pool_size=None):
+    """Returns a keep-alive session whose connection pool matches the per-host cap."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size or MAX_REQUESTS_PER_HOST)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def http_get(session, url, **kwargs):
+    with _host_limit(url):
+        return session.get(url, **kwargs)
+
+
+def http_post(session, url, **kwargs):
+    with _host_limit(url):
+        return session.post(url, **kwargs)
@@ -0,0 +1,117 @@
+"""Load test for the county_overview fetch pipeline against the local NC Courts stand-in.
+
+Starts fake_nccourts_server in-process, points county_overview at it and runs the
+counties from county_info.json through the same token provider, HTTP session, window
+splitting and page fan-out as a real run, then reports end-to-end cases/sec.
+
+    python load_test_county_overview.py --counties 10 --cases-per-day 40 --page-size 25
+    python load_test_county_overview.py --max-window-days 3 --latency 0.1 --sink rds --json results.json
+
+Sinks: "null" discards pages, "rds" also runs save_cases_to_rds, and "export" runs
+fetch_cases_for_county, i.e. RDS, checkpoints and the S3 export to BUCKET_NAME.
+The "null" sink never touches the database. The "rds" and "export" sinks need RDS_HOST
+to point at a reachable Postgres (a local container will do); db_config creates its
+tables there on first connection.
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fake_nccourts_server import AUTH_PATH, PARTYCASES_PATH, add_config_arguments, config_from_args, start_server
+
+SINKS = ["null", "rds", "export"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_config_arguments(parser)
+    parser.add_argument("--counties", type=int, help="only the first N counties of county_info.json")
+    parser.add_argument("--start-date", default="06/01/2025", help="MM/DD/YYYY")
+    parser.add_argument("--end-date", default="06/30/2025", help="MM/DD/YYYY")
+    parser.add_argument("--sink", choices=SINKS, default="null", help="what happens to each fetched page")
+    parser.add_argument("--county-concurrency", type=int, help="overrides COUNTY_CONCURRENCY")
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    args = parser.parse_args()
+
+    server, state, base_url = start_server(config_from_args(args))
+    # county_overview and token_provider read these at import time
+    os.environ["AUTH_URL"] = f"{base_url}{AUTH_PATH}"
+    os.environ["BASE_URL"] = f"{base_url}{PARTYCASES_PATH}"
+    os.environ["START_DATE"] = args.start_date
+    os.environ["END_DATE"] = args.end_date
+    os.environ["CHECKPOINT_RUN_ID"] = f"loadtest-{uuid.uuid4().hex}"
+    if args.county_concurrency:
+        os.environ["COUNTY_CONCURRENCY"] = str(args.county_concurrency)
+
+    import county_overview as pipeline
+    from http_client import create_http_session
+    from token_provider import BearerTokenProvider
+
+    start_date = datetime.strptime(args.start_date, "%m/%d/%Y").date()
+    end_date = datetime.strptime(args.end_date, "%m/%d/%Y").date()
+    counties = pipeline.load_county_data()[:args.counties]
+    Session = None
+    if args.sink != "null":
+        _, Session = pipeline.get_db_connection()
+        if Session is None:
+            parser.error(f"--sink {args.sink} needs a reachable Postgres at RDS_HOST")
+
+    http_session = create_http_session()
+    token_provider = BearerTokenProvider(
+        http_session, lambda: ("bG9hZHRlc3Q=", "bG9hZHRlc3Q="), pipeline.APP_CLIENT_ID, pipeline.TOKEN_SCOPE
+    )
+
+    def run_county(county, odyssey, county_node_ids):
+        started = time.perf_counter()
+        session = Session() if args.sink != "null" else None
+        try:
+            if args.sink == "export":
+                result = pipeline.fetch_cases_for_county(county, odyssey, county_node_ids, token_provider, session)
+                case_count = sum(item.get("cases", 0) for item in result) if isinstance(result, list) else 0
+            else:
+                on_page = (lambda page: pipeline.save_cases_to_rds(page, session)) if session else (lambda page: None)
+                case_count = pipeline.fetch_cases_by_date_range(
+                    county, odyssey, county_node_ids, token_provider, start_date, end_date, on_page
+                )
+        finally:
+            if session:
+                session.close()
+        return {"county": county, "cases": case_count, "seconds": round(time.perf_counter() - started, 3)}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, pipeline.COUNTY_CONCURRENCY)) as executor:
+        county_results = list(executor.map(lambda county: run_county(*county), counties))
+    elapsed = time.perf_counter() - started
+    http_session.close()
+    server.shutdown()
+
+    total_cases = sum(result["cases"] for result in county_results)
+    summary = {
+        "sink": args.sink,
+        "counties": len(county_results),
+        "cases": total_cases,
+        "seconds": round(elapsed, 3),
+        "cases_per_sec": round(total_cases / elapsed, 1) if elapsed else 0.0,
+        "county_concurrency": pipeline.COUNTY_CONCURRENCY,
+        "page_concurrency": pipeline.PAGE_CONCURRENCY,
+        "server": state.snapshot(),
+        "config": vars(config_from_args(args)),
+    }
+    for result in county_results:
+        print(f"{result['county']:<28} {result['cases']:>8} cases {result['seconds']:8.2f}s")
+    print(
+        f"{summary['counties']} counties, {total_cases} cases in {elapsed:.2f}s"
+        f" -> {summary['cases_per_sec']} cases/sec; server {summary['server']}"
+    )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"summary": summary, "counties": county_results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
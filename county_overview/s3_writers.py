@@ -0,0 +1,196 @@
+import json
+import os
+import tempfile
+import zlib
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+# S3 needs every part but the last to be at least 5 MiB
+PART_SIZE = int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024)))
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "50000"))
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class S3MultipartWriter:
+    """Uploads bytes to S3 as they are written, holding at most one part in memory.
+
+    Small objects that never fill a part are sent with a single put_object on close.
+    """
+
+    def __init__(self, s3_client, bucket, key, content_type, part_size=PART_SIZE):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.parts = []
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self.buffer) >= self.part_size:
+            self._upload_part()
+
+    def _upload_part(self):
+        if self.upload_id is None:
+            self.upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )["UploadId"]
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+            PartNumber=part_number, Body=bytes(self.buffer),
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self.buffer = bytearray()
+
+    def close(self):
+        if self.upload_id is None:
+            self.s3_client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=bytes(self.buffer), ContentType=self.content_type
+            )
+        else:
+            if self.buffer:
+                self._upload_part()
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                MultipartUpload={"Parts": self.parts},
+            )
+            # Completed, so a later abort() must not touch it
+            self.upload_id = None
+        self.buffer = bytearray()
+
+    def abort(self):
+        if self.upload_id is not None:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+            self.upload_id = None
+        self.buffer = bytearray()
+
+
+class JsonLinesWriter:
+    """Writes records to S3 as JSON Lines, optionally gzip-compressed on the fly."""
+
+    def __init__(self, s3_client, bucket, key, compress=False):
+        self.compressor = zlib.compressobj(wbits=31) if compress else None
+        content_type = "application/gzip" if compress else "application/x-ndjson"
+        self.writer = S3MultipartWriter(s3_client, bucket, key, content_type)
+        self.count = 0
+
+    def write(self, records):
+        data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        if self.compressor:
+            data = self.compressor.compress(data)
+        self.writer.write(data)
+        self.count += len(records)
+
+    def close(self):
+        if self.compressor:
+            self.writer.write(self.compressor.flush())
+        self.writer.close()
+
+    def abort(self):
+        self.writer.abort()
+
+
+class XlsxStreamWriter:
+    """Appends rows to a constant-memory xlsx on local disk and streams it to S3 on close."""
+
+    def __init__(self, s3_client, bucket, key, columns, sheet_name="Cases"):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.columns = columns
+        fd, self.path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        self.workbook = xlsxwriter.Workbook(self.path, {"constant_memory": True})
+        self.sheet = self.workbook.add_worksheet(sheet_name)
+        self.sheet.write_row(0, 0, columns, self.workbook.add_format({"bold": True}))
+        self.row = 1
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.write_row(self.row, 0, [row.get(column, "") for column in self.columns])
+            self.row += 1
+
+    def close(self):
+        try:
+            self.workbook.close()
+            # upload_file streams from disk and switches to multipart for large files
+            self.s3_client.upload_file(
+                self.path, self.bucket, self.key,
+                ExtraArgs={"ContentType": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+            )
+        finally:
+            self._discard()
+
+    def abort(self):
+        # Safe to call again, or after close()
+        if self.path is None:
+            return
+        try:
+            self.workbook.close()
+        finally:
+            self._discard()
+
+    def _discard(self):
+        remove_file(self.path)
+        self.path = None
+
+
+class ParquetStreamWriter:
+    """Buffers rows into row groups of a local Parquet file and uploads it to S3 on close."""
+
+    def __init__(self, s3_client, bucket, key, schema, row_group_size=PARQUET_ROW_GROUP_SIZE):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.schema = schema
+        self.row_group_size = row_group_size
+        fd, self.path = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        self.writer = pq.ParquetWriter(self.path, schema, compression="snappy")
+        self.rows = []
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.row_group_size:
+            self._write_row_group()
+
+    def _write_row_group(self):
+        if self.rows:
+            self.writer.write_table(pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        try:
+            self._write_row_group()
+            self.writer.close()
+            self.s3_client.upload_file(
+                self.path, self.bucket, self.key, ExtraArgs={"ContentType": "application/vnd.apache.parquet"}
+            )
+        finally:
+            self._discard()
+
+    def abort(self):
+        # Safe to call again, or after close()
+        if self.path is None:
+            return
+        try:
+            self.writer.close()
+        finally:
+            self._discard()
+
+    def _discard(self):
+        remove_file(self.path)
+        self.path = None
@@ -0,0 +1,83 @@
+import logging
+import os
+import threading
+import time
+
+from http_client import http_get, http_post
+
+logger = logging.getLogger("county_overview")
+
+AUTH_URL = os.getenv("AUTH_URL", "https://prdaws.nccourts.org/authentication_proxy/api/v1/authorize")
+# The authorize endpoint does not return a lifetime; tokens are good for 300 seconds
+TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", "300"))
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "60"))
+
+
+class BearerTokenProvider:
+    """Hands out NC Courts bearer tokens to every fetch thread.
+
+    Tokens are refreshed TOKEN_REFRESH_MARGIN_SECONDS before they expire, so long
+    runs never send a stale one. A 401 invalidates the token and the request is
+    retried once with a new one. Credentials are read from Secrets Manager on the
+    first refresh and kept in memory afterwards.
+    """
+
+    def __init__(self, http_session, load_credentials, app_client_id, token_scope):
+        self.http_session = http_session
+        self.load_credentials = load_credentials
+        self.app_client_id = app_client_id
+        self.token_scope = token_scope
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._token = None
+        self._expires_at = 0
+
+    def _get_credentials(self):
+        if self._credentials is None:
+            encoded_email, encoded_password = self.load_credentials()
+            if not encoded_email or not encoded_password:
+                raise ValueError("Failed to retrieve credentials from Secrets Manager")
+            self._credentials = (encoded_email, encoded_password)
+        return self._credentials
+
+    def _refresh(self):
+        encoded_email, encoded_password = self._get_credentials()
+        data = {
+            "appClientId": self.app_client_id,
+            "tokenScope": self.token_scope,
+            "userEmailAddress": encoded_email,
+            "userPassword": encoded_password,
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        response = http_post(self.http_session, AUTH_URL, headers=headers, data=data, timeout=30)
+        if response.status_code != 200:
+            raise ValueError(f"Failed to get new token: {response.status_code} - {response.text}")
+        self._token = response.json()["accessToken"]
+        self._expires_at = time.time() + TOKEN_TTL_SECONDS
+        logger.info("New token generated successfully.")
+
+    def get_token(self):
+        """Returns a token with at least the refresh margin left, refreshing if needed."""
+        with self._lock:
+            if not self._token or time.time() >= self._expires_at - TOKEN_REFRESH_MARGIN_SECONDS:
+                logger.info("Bearer token expiring or missing. Generating a new one.")
+                self._refresh()
+            return self._token
+
+    def invalidate(self, token):
+        with self._lock:
+            # Another thread may already have replaced it
+            if self._token == token:
+                self._token = None
+                self._expires_at = 0
+
+    def get(self, url, headers=None, **kwargs):
+        """GET with the current bearer token, retrying once with a fresh token on 401."""
+        token = self.get_token()
+        response = http_get(self.http_session, url, headers={**(headers or {}), "Authorization": f"Bearer {token}"}, **kwargs)
+        if response.status_code == 401:
+            logger.warning(f"401 from {url}; refreshing bearer token and retrying once.")
+            self.invalidate(token)
+            token = self.get_token()
+            response = http_get(self.http_session, url, headers={**(headers or {}), "Authorization": f"Bearer {token}"}, **kwargs)
+        return response
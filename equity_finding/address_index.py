@@ -0,0 +1,99 @@
+import os
+import re
+
+from address_normalizer import ADDRESS_REPLACEMENTS, DIRECTIONAL_KEYWORDS, STREET_KEYWORDS, normalize_address_keywords
+
+TOKEN_SPLIT = re.compile(r"[^0-9A-Z]+")
+
+FUZZY_MATCH_MIN_SCORE = float(os.getenv("FUZZY_MATCH_MIN_SCORE", "0.6"))
+
+# Tokens that qualify a street rather than name it, as they come out of the normalizer
+DIRECTION_TOKENS = {"N", "S", "E", "W"} | {word.upper() for word in DIRECTIONAL_KEYWORDS if " " not in word}
+UNIT_TOKENS = {"APT", "APARTMENT", "UNIT", "STE", "SUITE"}
+SUFFIX_TOKENS = (
+    {word.upper() for word in STREET_KEYWORDS} | {abbr.upper() for abbr in ADDRESS_REPLACEMENTS.values()}
+) - DIRECTION_TOKENS - UNIT_TOKENS
+
+
+def tokenize_address(address):
+    """Splits an address into (house number, street name tokens, directions, suffixes).
+
+    House number is None if absent. Directions and street types are kept apart from
+    the name, so "100 N ELM ST" and "100 NORTH MAIN STREET" share no name token.
+    """
+    tokens = [token for token in TOKEN_SPLIT.split(normalize_address_keywords(address)) if token]
+    if not tokens or not tokens[0].isdigit():
+        return None, (), frozenset(), frozenset()
+    street_tokens = tokens[1:]
+    name_tokens = tuple(dict.fromkeys(
+        token for token in street_tokens
+        if token not in DIRECTION_TOKENS and token not in SUFFIX_TOKENS and token not in UNIT_TOKENS
+    ))
+    directions = frozenset(token for token in street_tokens if token in DIRECTION_TOKENS)
+    suffixes = frozenset(token for token in street_tokens if token in SUFFIX_TOKENS)
+    return tokens[0], name_tokens, directions, suffixes
+
+
+def conflicts(ours, theirs):
+    """True if both addresses give a direction (or street type) and they differ"""
+    return bool(ours) and bool(theirs) and ours != theirs
+
+
+class FuzzyAddressIndex:
+    """Inverted index of (house number, street name token) -> parcels, for addresses
+    that miss on exact SITEADD/MAILADD lookup.
+
+    Candidates are only the parcels sharing the house number and at least one street
+    name token, so a search never scans the county. Candidates are ranked by the Dice
+    coefficient of their street name tokens; one whose direction or street type
+    contradicts the query's (N vs S, ST vs AVE) is a different street and skipped.
+    Records are parcel attribute dicts; the same PARNO indexed twice is one parcel.
+    """
+
+    def __init__(self, min_score=FUZZY_MATCH_MIN_SCORE):
+        self.min_score = min_score
+        self.records = []
+        self.record_tokens = []
+        self.postings = {}
+
+    def add(self, address, record):
+        house_number, tokens, directions, suffixes = tokenize_address(address)
+        if not house_number or not tokens:
+            return
+        record_id = len(self.records)
+        self.records.append(record)
+        self.record_tokens.append((tokens, directions, suffixes))
+        for token in tokens:
+            self.postings.setdefault((house_number, token), []).append(record_id)
+
+    def search(self, address):
+        """Returns (record, score) for the best candidate, or (None, 0.0) if nothing
+        scores at least min_score or the best score is shared by different parcels."""
+        house_number, tokens, directions, suffixes = tokenize_address(address)
+        if not house_number or not tokens:
+            return None, 0.0
+
+        hits = {}
+        for token in tokens:
+            for record_id in self.postings.get((house_number, token), ()):
+                hits[record_id] = hits.get(record_id, 0) + 1
+        if not hits:
+            return None, 0.0
+
+        best_id, best_score, tied = None, 0.0, False
+        for record_id, shared in hits.items():
+            record_tokens, record_directions, record_suffixes = self.record_tokens[record_id]
+            if conflicts(directions, record_directions) or conflicts(suffixes, record_suffixes):
+                continue
+            score = 2 * shared / (len(tokens) + len(record_tokens))
+            if score > best_score:
+                best_id, best_score, tied = record_id, score, False
+            elif score == best_score and self.records[record_id]["PARNO"] != self.records[best_id]["PARNO"]:
+                tied = True
+
+        if best_score < self.min_score or tied:
+            return None, best_score
+        return self.records[best_id], round(best_score, 3)
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,114 @@
+import re
+
+# Directional keywords
+DIRECTIONAL_KEYWORDS = [
+    "Northeast", "North East", "NE",
+    "Northwest", "North West", "NW",
+    "Southeast", "South East", "SE",
+    "Southwest", "South West", "SW",
+]
+
+# Street type keywords
+STREET_KEYWORDS = [
+    "Drive", "Dr", "Avenue", "Ave", "Road", "Rd", "Parkway", "Pkwy",
+    "Court", "Ct", "Street", "St", "Boulevard", "Blvd", "Lane", "Ln",
+    "Highway", "Hwy", "Apartment", "Apt", "Unit", "Suite", "Ste","Circle","Cir",
+    "Extension", "EXT", "Ext","Place","Pl",
+]
+
+ADDRESS_REPLACEMENTS = {
+    'Drive': 'Dr',
+    'Avenue': 'Ave',
+    'Road': 'Rd',
+    'Parkway': 'Pkwy',
+    'Court': 'Ct',
+    'Street': 'St',
+    'Boulevard': 'Blvd',
+    'Lane': 'Ln',
+    'Highway': 'Hwy',
+    'Apartment': 'Apt',
+    'Unit': 'Unit',
+    'Suite': 'Ste',
+    'Northeast': 'NE',
+    'North East': 'NE',
+    'Northwest': 'NW',
+    'North West': 'NW',
+    'Southeast': 'SE',
+    'South East': 'SE',
+    'Southwest': 'SW',
+    'South West': 'SW',
+    'Place': 'PL',
+    'Extension': 'EXT',
+    'Circle': 'CIR',
+    'North': 'N',
+    'South': 'S',
+    'West': 'W',
+    'East': 'E',
+}
+
+# One alternation for every replacement, longest first so "North East" wins over "North"
+_REPLACEMENT_LOOKUP = {word.upper(): abbr for word, abbr in ADDRESS_REPLACEMENTS.items()}
+_REPLACEMENT_PATTERN = re.compile(
+    r"\b(?:" + "|".join(
+        re.escape(word) for word in sorted(ADDRESS_REPLACEMENTS, key=len, reverse=True)
+    ) + r")\b",
+    re.IGNORECASE,
+)
+
+# Per-keyword patterns compiled once; keyword order decides which one wins
+_DIRECTIONAL_PATTERNS = [
+    (keyword, re.compile(rf"(.*?\b{re.escape(keyword)}\b)")) for keyword in DIRECTIONAL_KEYWORDS
+]
+_STREET_PATTERNS = [
+    re.compile(rf"(.*?\b{keyword}\b)", re.IGNORECASE) for keyword in STREET_KEYWORDS
+]
+
+
+def _replace_keyword(match):
+    return _REPLACEMENT_LOOKUP[match.group(0).upper()]
+
+
+def normalize_address_keywords(address):
+    """Abbreviates street types and directionals in one pass and upper-cases the result"""
+    return _REPLACEMENT_PATTERN.sub(_replace_keyword, address).upper()
+
+
+def normalize_index_key(address):
+    """Normalizes a GeoJSON SITEADD/MAILADD value so it compares equal to normalized queries"""
+    if not address:
+        return address
+    return normalize_address_keywords(str(address))
+
+
+def extract_mailing_address(address):
+    """Cuts a free-form property address down to its street part"""
+    if not ',' in address or address.count(',')==1:
+        # 1. Check for directional keywords
+        for keyword, pattern in _DIRECTIONAL_PATTERNS:
+            if keyword in address:
+                parts = address.split()
+                for i in range(len(parts)):
+                    if parts[i] == keyword:
+                        return " ".join(parts[:i+1])  # Include the keyword
+                # If partial match (like "SW" attached to street), fallback to regex
+                match = pattern.search(address)
+                if match:
+                    return match.group(1).strip()
+
+        # 2. Check for street type keywords
+        for pattern in _STREET_PATTERNS:
+            match = pattern.search(address)
+            if match:
+                return match.group(1).strip()
+
+    # Case 1: If comma exists, split at first comma
+    if ',' in address and not '.' in address:
+        return address.split(',')[0].strip()
+
+    if '.' in address and address.count(',') > 1:
+        return address.split(',')[0].strip()
+    if '.' in address:
+        return address.split('.')[0].strip()
+
+    # 3. Fallback to full address if nothing matched
+    return address.strip()
@@ -0,0 +1,207 @@
+"""Parcel-index benchmark for equity_finding.
+
+Generates synthetic county GeoJSON files and times each way of getting from the
+file to a ParcelIndex, plus address normalization and lookups. Every strategy runs
+in its own spawned process so the reported peak RSS belongs to that strategy alone.
+
+    python benchmark_parcel_index.py --county 590 --county 910
+    python benchmark_parcel_index.py --features 50000 --features 200000 --json results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+# Approximate parcel counts of the large counties
+COUNTY_PRESETS = {
+    "590": ("mecklenburg", 400000),
+    "910": ("wake", 430000),
+    "400": ("guilford", 220000),
+}
+
+STRATEGIES = ["json_full", "stream", "arrow_cache"]
+
+STREET_NAMES = [
+    "MAIN", "OAK", "ELM", "PINE", "MAPLE", "CEDAR", "TRYON", "GLENWOOD", "HILLSBOROUGH",
+    "SIX FORKS", "FALLS OF NEUSE", "PROVIDENCE", "SHARON AMITY", "BATTLEGROUND",
+]
+STREET_TYPES = ["Street", "Drive", "Avenue", "Road", "Court", "Lane", "Place", "Circle", "ST", "DR", "RD"]
+DIRECTIONS = ["", "", "", "North", "South", "N", "S", "E", "W"]
+# Attributes the real files carry but the lookups never read
+EXTRA_FIELDS = ["GISACRES", "LANDVAL", "IMPROVVAL", "PRESENTVAL", "STRUCTYEAR", "SUBDIVISIO",
+                "LEGDECFULL", "STCNTYFIPS", "CNTYNAME", "MAILCITY", "MAILSTATE", "MAILZIP"]
+
+
+def random_address(rng):
+    parts = [str(rng.randint(1, 19999)), rng.choice(DIRECTIONS), rng.choice(STREET_NAMES), rng.choice(STREET_TYPES)]
+    return " ".join(part for part in parts if part)
+
+
+def random_polygon(rng, vertices):
+    x, y = rng.uniform(-81.0, -78.0), rng.uniform(35.0, 36.5)
+    ring = [[x + rng.uniform(-0.001, 0.001), y + rng.uniform(-0.001, 0.001)] for _ in range(vertices)]
+    ring.append(ring[0])
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def generate_geojson(path, features, vertices=24, seed=7):
+    """Writes a synthetic county parcel file, one feature at a time"""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write('{"type": "FeatureCollection", "features": [')
+        for i in range(features):
+            site_address = random_address(rng).upper()
+            properties = {
+                "PARNO": f"{i:08d}",
+                "ALTPARNO": f"A{i:08d}" if i % 3 == 0 else None,
+                "PARVAL": rng.randint(20000, 2000000),
+                "SOURCEREF": f"{rng.randint(1000, 40000)}/{rng.randint(1, 999)}",
+                "SADDNO": site_address.split()[0],
+                "SADDSTNAME": rng.choice(STREET_NAMES),
+                "SADDSTR": site_address,
+                "SADDSTTYP": rng.choice(STREET_TYPES),
+                "SCITY": "CHARLOTTE",
+                "SITEADD": site_address,
+                "OWNFRST": "JOHN",
+                "OWNLAST": "DOE",
+                "OWNNAME": "DOE JOHN",
+                "MAILADD": random_address(rng).upper() if i % 4 == 0 else site_address,
+            }
+            properties.update({field: rng.random() for field in EXTRA_FIELDS})
+            feature = {"type": "Feature", "properties": properties, "geometry": random_polygon(rng, vertices)}
+            f.write(("," if i else "") + json.dumps(feature))
+        f.write("]}")
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_strategy(strategy, geojson_path, county_id, lookups):
+    """Runs in a fresh process: load, index, normalize and look up with one strategy"""
+    import logging
+    logging.getLogger("equity_finding_logger").setLevel(logging.WARNING)
+
+    from equity_finding import ParcelIndex
+    from address_normalizer import extract_mailing_address, normalize_address_keywords
+    from parcel_cache import build_parcel_table, iter_feature_properties, iter_parcel_batches, read_parcel_cache
+
+    baseline_rss = peak_rss_mb()
+    timings = {}
+
+    start = time.perf_counter()
+    if strategy == "json_full":
+        with open(geojson_path) as f:
+            source = json.load(f)
+    elif strategy == "stream":
+        with open(geojson_path, "rb") as f:
+            source = build_parcel_table(iter_parcel_batches(iter_feature_properties(f)), "bench")
+    else:
+        source = read_parcel_cache(county_id, "bench")
+    timings["load_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if strategy == "json_full":
+        index = ParcelIndex.from_geojson(county_id, source)
+    else:
+        index = ParcelIndex.from_table(county_id, source)
+    timings["index_build_s"] = time.perf_counter() - start
+
+    rng = random.Random(11)
+    site_addresses = list(index.site_address_lookup)
+    parcel_ids = list(index.parcel_lookup)
+    queries = [rng.choice(site_addresses).title() + ", CHARLOTTE, NC 28202" for _ in range(lookups)]
+
+    start = time.perf_counter()
+    normalized = [normalize_address_keywords(extract_mailing_address(query)) for query in queries]
+    timings["normalize_us"] = (time.perf_counter() - start) / lookups * 1e6
+
+    start = time.perf_counter()
+    exact_hits = sum(1 for query in normalized if index.find_by_site_address(query))
+    timings["site_lookup_us"] = (time.perf_counter() - start) / lookups * 1e6
+
+    start = time.perf_counter()
+    for _ in range(lookups):
+        index.find_by_parcel_id(rng.choice(parcel_ids))
+    timings["parcel_lookup_us"] = (time.perf_counter() - start) / lookups * 1e6
+
+    # Drop the street type so the exact lookup would miss
+    fuzzy_queries = [query.rsplit(" ", 1)[0] for query in normalized]
+    start = time.perf_counter()
+    fuzzy_hits = sum(1 for query in fuzzy_queries if index.fuzzy_address_index.search(query)[0])
+    timings["fuzzy_lookup_us"] = (time.perf_counter() - start) / lookups * 1e6
+
+    timings["exact_hit_rate"] = exact_hits / lookups
+    timings["fuzzy_hit_rate"] = fuzzy_hits / lookups
+    timings["peak_rss_mb"] = peak_rss_mb()
+    timings["rss_growth_mb"] = timings["peak_rss_mb"] - baseline_rss
+    return timings
+
+
+def prepare_arrow_cache(geojson_path, county_id):
+    from parcel_cache import iter_feature_properties, iter_parcel_batches, write_parcel_cache
+    with open(geojson_path, "rb") as f:
+        write_parcel_cache(county_id, iter_parcel_batches(iter_feature_properties(f)), "bench")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--county", action="append", default=[], choices=sorted(COUNTY_PRESETS),
+                        help="benchmark a preset county size (repeatable)")
+    parser.add_argument("--features", action="append", type=int, default=[],
+                        help="benchmark a synthetic county with this many features (repeatable)")
+    parser.add_argument("--strategy", action="append", choices=STRATEGIES, help="limit to these strategies")
+    parser.add_argument("--vertices", type=int, default=24, help="polygon vertices per feature")
+    parser.add_argument("--lookups", type=int, default=20000, help="queries per lookup benchmark")
+    parser.add_argument("--workdir", help="where to keep generated files (default: a temp dir)")
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    args = parser.parse_args()
+
+    sizes = [(county_id, COUNTY_PRESETS[county_id][1]) for county_id in args.county]
+    sizes += [("bench", features) for features in args.features]
+    if not sizes:
+        sizes = [("bench", 50000)]
+
+    json_path = os.path.abspath(args.json_path) if args.json_path else None
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="parcel_bench_"))
+    os.environ["PARCEL_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # keeps the benchmark's log file out of the source tree
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    for county_id, features in sizes:
+        geojson_path = os.path.join(workdir, f"{county_id}_{features}.geojson")
+        if not os.path.exists(geojson_path):
+            print(f"Generating {features} features -> {geojson_path}")
+            generate_geojson(geojson_path, features, args.vertices)
+        file_mb = os.path.getsize(geojson_path) / 1024 / 1024
+
+        with context.Pool(1) as pool:
+            pool.apply(prepare_arrow_cache, (geojson_path, county_id))
+
+        for strategy in args.strategy or STRATEGIES:
+            with context.Pool(1) as pool:
+                timings = pool.apply(run_strategy, (strategy, geojson_path, county_id, args.lookups))
+            result = {"county_id": county_id, "features": features, "file_mb": round(file_mb, 1), "strategy": strategy}
+            result.update({key: round(value, 3) for key, value in timings.items()})
+            results.append(result)
+            print(
+                f"{county_id:>6} {features:>8} feats {file_mb:8.1f} MB  {strategy:<12}"
+                f" load {result['load_s']:7.2f}s  index {result['index_build_s']:6.2f}s"
+                f"  norm {result['normalize_us']:6.1f}us  site {result['site_lookup_us']:5.2f}us"
+                f"  fuzzy {result['fuzzy_lookup_us']:6.1f}us  peak {result['peak_rss_mb']:8.1f} MB"
+            )
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
 import sqlalchemy
-from sqlalchemy import create_engine,Table, select, Column, update, String, MetaData, Date, Integer,Numeric, Boolean,func, select, and_,or_, literal_column,union_all, null,cast,text
+from sqlalchemy import create_engine,Table, select, Column, update, String, MetaData, Date, DateTime, Integer,Numeric, Boolean,func, select, and_,or_, literal_column,union_all, null,cast,text
 # from sqlalchemy.orm import sessionmaker, declarative_base
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import distinct
+from sqlalchemy.sql import distinct, values, column
+from sqlalchemy.dialects.postgresql import insert
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import groupby
+import multiprocessing
 import json
 import boto3
 import os
 from logger_config import setup_logger
-import time
+from parcel_cache import PARCEL_BATCH_SIZE, load_parcel_table
+from pacing import RDS_PACER
+from address_normalizer import extract_mailing_address, normalize_address_keywords, normalize_index_key
+from address_index import FuzzyAddressIndex
 import re
 
 # Database Configuration
@@ -22,6 +30,10 @@ DATABASE_URL = f"postgresql://{RDS_USER}:{RDS_PASSWORD}@{RDS_HOST}:{RDS_PORT}/{R
 SCHEMA_NAME = os.getenv("SCHEMA", "vivid-dev-schema")
 
 BUCKET_NAME_CLEANED_GEOJSON = "vivid-cleaned-geojson"
+
+CHECKPOINT_JOB_NAME = "equity_finding"
+EQUITY_PAGE_SIZE = int(os.getenv("EQUITY_PAGE_SIZE", "1000"))
+EQUITY_FULL_RUN = os.getenv("EQUITY_FULL_RUN", "false").lower() == "true"
 BUCKET_NAME = os.getenv("BUCKET_NAME", "")
 
 COUNTIES = {
@@ -40,6 +52,10 @@ COUNTIES = {
     '310': 'durham'
 }
 
+# Counties whose SITEADD/MAILADD put two spaces after the house number
+DOUBLE_SPACE_COUNTIES = ['590','640','180']
+DOUBLE_SPACE_HOUSE_NUMBER = re.compile(r'^(\d+)(\s+)')
+
 def get_db_connection():
     """Returns DB engine"""
     try:
@@ -65,125 +81,115 @@ def store_logs(LOG_FILE):
     except Exception as e:
         logger.error(f"Failed to upload log to S3: {str(e)}")
 
-def get_parcel_numbers(engine):
+def get_checkpoint_table():
+    metadata = MetaData(schema=SCHEMA_NAME)
+    return Table(
+        "equity_finding_checkpoint", metadata,
+        Column("job_name", String, primary_key=True),
+        Column("high_water_mark", DateTime),
+        Column("updated_at", DateTime),
+    )
 
+def get_high_water_mark(engine):
+    """Returns the change timestamp the next run reads from, or None"""
+    checkpoint = get_checkpoint_table()
     try:
-        """Fetch case_number where document_pull_recommended is True"""
-        
-        metadata = MetaData(schema=SCHEMA_NAME)
-        # Reflect the table
-        tax_info = Table("tax_info", metadata, autoload_with=engine)
-        property_info = Table("property_info",metadata,autoload_with=engine)
-        
-        # p = property_info.alias("p")
-        # t = tax_info.alias("t")
-
-        query = (
-            select(
-                property_info.c.case_number,
-                property_info.c.parcel_or_tax_id,
-                property_info.c.property_address,
-                tax_info.c.amount_owed,
-                property_info.c.deed_book_number,
-                property_info.c.deed_page_number,
-            )
-            .distinct(property_info.c.case_number)
-            .select_from(
-                property_info.join(tax_info, property_info.c.case_number == tax_info.c.case_number)
-            )
-            .where(
-                and_(
-                    and_(property_info.c.manual_review == False,
-                    property_info.c.ncmap_updated.is_(None),
-                    tax_info.c.manual_review == False),
-                )
-            )
-            .order_by(property_info.c.case_number.asc())
-        )
-        print("QUERY: ",query)
-        # query = (
-        #     select(
-        #         property_info.c.case_number,
-        #         property_info.c.parcel_or_tax_id,
-        #         property_info.c.property_address,
-        #         tax_info.c.amount_owed,
-        #     )
-        #     .distinct(property_info.c.case_number)  # DISTINCT ON (p.case_number)
-        #     .select_from(
-        #         property_info.join(tax_info, property_info.c.case_number == tax_info.c.case_number)
-        #     )
-        #     .where(
-        #         and_(
-        #             or_(
-        #                 and_(
-        #                     property_info.c.parcel_or_tax_id.isnot(None),
-        #                     property_info.c.parcel_or_tax_id != ''
-        #                 ),
-        #                 property_info.c.property_address.isnot(None)
-        #             ),
-        #             property_info.c.ncmap_updated.is_(None)
-        #         )
-        #     )
-        #     .order_by(property_info.c.case_number.asc())
-        # )
-
-        # Execute the query
+        RDS_PACER.wait()
+        checkpoint.create(engine, checkfirst=True)
         with engine.connect() as conn:
-            result = conn.execute(query)
-            # case_numbers_list = [row[0] for row in result.fetchall()]
-            data = [{"case_number": row[0], "parcel_id": row[1],"amount_owed":row[3], "property_address":row[2], "deed_book_number": row[4], "deed_page_number": row[5]} for row in result]
-
-        logger.info(f"Parcel Data: {data} Length: {len(data)}")
-        return data
-    
-
-    
+            return conn.execute(
+                select(checkpoint.c.high_water_mark).where(checkpoint.c.job_name == CHECKPOINT_JOB_NAME)
+            ).scalar()
     except Exception as e:
-        logger.error(f"Error fetching parcel numbers: {e}")
+        logger.error(f"Error reading equity checkpoint: {e}")
         return None
 
-def get_geojson(county_id):
-    s3 = boto3.client('s3',region_name="us-east-1")
+def save_high_water_mark(engine, high_water_mark):
+    checkpoint = get_checkpoint_table()
+    stmt = insert(checkpoint).values(
+        job_name=CHECKPOINT_JOB_NAME, high_water_mark=high_water_mark, updated_at=datetime.now()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[checkpoint.c.job_name],
+        set_={"high_water_mark": stmt.excluded.high_water_mark, "updated_at": stmt.excluded.updated_at},
+    )
+    try:
+        RDS_PACER.wait()
+        with engine.begin() as conn:
+            conn.execute(stmt)
+        logger.info(f"[CHECKPOINT SAVED] high water mark {high_water_mark}")
+    except Exception as e:
+        logger.error(f"Error saving equity checkpoint: {e}")
+
+def get_parcel_numbers(engine, since=None):
+    """Streams the cases still waiting for NC map data, one county at a time.
+
+    Rows come from a server-side cursor in pages of EQUITY_PAGE_SIZE, ordered by
+    county suffix and then case_number. A case's change time is the later of its
+    property_info and tax_info last_updated_at (or created_at), so a late tax_info row,
+    or a manual_review cleared on either table along with its last_updated_at, brings
+    the case back. When ``since`` is
+    set, only cases changed at or after it, or with no timestamp at all, are returned;
+    rows on the mark itself are read again, which is harmless since written cases drop
+    out of ncmap_updated IS NULL.
+    """
+    metadata = MetaData(schema=SCHEMA_NAME)
+    # Reflect the table
+    tax_info = Table("tax_info", metadata, autoload_with=engine)
+    property_info = Table("property_info",metadata,autoload_with=engine)
+
+    # GREATEST skips NULLs, so either table's time counts and only all-NULL gives NULL
+    changed_at = func.greatest(
+        func.coalesce(property_info.c.last_updated_at, property_info.c.created_at),
+        func.coalesce(tax_info.c.last_updated_at, tax_info.c.created_at),
+    )
+    conditions = [
+        property_info.c.manual_review == False,
+        property_info.c.ncmap_updated.is_(None),
+        tax_info.c.manual_review == False,
+    ]
+    if since is not None:
+        conditions.append(or_(changed_at >= since, changed_at.is_(None)))
+
+    cases = (
+        select(
+            property_info.c.case_number,
+            property_info.c.parcel_or_tax_id,
+            property_info.c.property_address,
+            tax_info.c.amount_owed,
+            property_info.c.deed_book_number,
+            property_info.c.deed_page_number,
+            changed_at.label("changed_at"),
+        )
+        .distinct(property_info.c.case_number)
+        .select_from(
+            property_info.join(tax_info, property_info.c.case_number == tax_info.c.case_number)
+        )
+        .where(and_(*conditions))
+        .order_by(property_info.c.case_number.asc())
+        .subquery("cases")
+    )
+    query = select(cases).order_by(func.right(cases.c.case_number, 3), cases.c.case_number)
+    logger.info(f"QUERY: {query}")
+
+    RDS_PACER.wait()
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=EQUITY_PAGE_SIZE).execute(query)
+        for page in result.partitions(EQUITY_PAGE_SIZE):
+            for row in page:
+                yield {"case_number": row[0], "parcel_id": row[1],"amount_owed":row[3], "property_address":row[2], "deed_book_number": row[4], "deed_page_number": row[5], "changed_at": row[6]}
+
+def get_parcel_table(county_id):
+    """Returns the county's cached parcel attribute table, or None if it is unavailable"""
     county_name = COUNTIES.get(county_id, '')
 
     if not county_name:
-        return {
-            'success': False,
-            'msg': f"County name not found for ID {county_id}",
-            'data': None
-        }
+        logger.warning(f"County name not found for ID {county_id}")
+        return None
 
     s3_key = f"{county_name}_{county_id}_geojson/nc_{county_name}_parcels_poly.geojson"
-    print(f"S3 Key: {s3_key}")
-
-    # Ensure local directory exists
-    local_dir = "geojson_cache"
-    os.makedirs(local_dir, exist_ok=True)
-    local_path = os.path.join(local_dir, f"{county_id}_polygon.geojson")
-
-    if os.path.exists(local_path):
-        logger.info("Geojson existed in local path!")
-        with open(local_path, 'r') as f:
-            geojson_data = json.load(f)
-            time.sleep(2)
-        return geojson_data
-    else:
-        try:
-            logger.info("Downloading from S3...")
-            response = s3.get_object(Bucket=BUCKET_NAME_CLEANED_GEOJSON, Key=s3_key)
-            geojson_data = json.loads(response['Body'].read())
-
-            # Save locally for future use
-            with open(local_path, 'w') as f:
-                json.dump(geojson_data, f)
-                logger.info("GEOJSON SAVED IN LOCAL FOLDER")
-            time.sleep(1)
-            with open(local_path, 'r') as r:
-                geojson_dict_data = json.load(r)
-                time.sleep(2)
-            return geojson_dict_data
-        except s3.exceptions.NoSuchKey:
-            return None
+    logger.info(f"S3 Key: {s3_key}")
+    return load_parcel_table(county_id, BUCKET_NAME_CLEANED_GEOJSON, s3_key)
         
 
 # def map_with_parcel_id(geojson_file):
@@ -218,254 +224,153 @@ def get_geojson(county_id):
 #     return parcel_lookup
 
 
-def map_with_parcel_id(geojson_file):
-    try:
-        parcel_lookup = {
-            feature["properties"]["PARNO"]: {
-                "PARVAL": feature["properties"].get("PARVAL"),
-                "SOURCEREF": feature["properties"].get("SOURCEREF"),
-                "SADDNO": feature["properties"].get("SADDNO"),
-                "SADDSTNAME": feature["properties"].get("SADDSTNAME"),
-                "SADDSTR": feature["properties"].get("SADDSTR"),
-                "SADDSTTYP": feature["properties"].get("SADDSTTYP"),
-                "SCITY": feature["properties"].get("SCITY"),
-                "SITEADD": feature["properties"].get("SITEADD"),
-                "OWNFRST": feature["properties"].get("OWNFRST"),
-                "OWNLAST": feature["properties"].get("OWNLAST"),
-                "OWNNAME": feature["properties"].get("OWNNAME"),
-                "MAILADD": feature["properties"].get("MAILADD"),
-            }
-            for feature in geojson_file.get("features", [])
-            if feature["properties"].get("PARNO")
-        }
-
-        alt_parcel_lookup = {
-            feature["properties"]["ALTPARNO"]: {
-                "PARVAL": feature["properties"].get("PARVAL"),
-                "SOURCEREF": feature["properties"].get("SOURCEREF"),
-                "SADDNO": feature["properties"].get("SADDNO"),
-                "SADDSTNAME": feature["properties"].get("SADDSTNAME"),
-                "SADDSTR": feature["properties"].get("SADDSTR"),
-                "SADDSTTYP": feature["properties"].get("SADDSTTYP"),
-                "SCITY": feature["properties"].get("SCITY"),
-                "SITEADD": feature["properties"].get("SITEADD"),
-                "OWNFRST": feature["properties"].get("OWNFRST"),
-                "OWNLAST": feature["properties"].get("OWNLAST"),
-                "OWNNAME": feature["properties"].get("OWNNAME"),
-                "MAILADD": feature["properties"].get("MAILADD"),
-            }
-            for feature in geojson_file.get("features", [])
-            if feature["properties"].get("ALTPARNO")
-        }
-        time.sleep(2)
-
-        return {
-            'success': True,
-            'msg': 'Successfully extracted geojson',
-            'data': {'parcel_lookup': parcel_lookup, 'alt_parcel_lookup': alt_parcel_lookup}
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'msg': f"Error loading GeoJSON: {e}",
-            'data': None
-        }
-
-def map_with_book_page_no(geojson_file):
-    try:
-        book_page_lookup = {}
-        for feature in geojson_file.get("features", []):
-            source_ref = feature["properties"].get("SOURCEREF")
-            if not source_ref:
-                continue
-            
-            # Split SOURCEREF into book and page (e.g., "33649/924" -> ["33649", "924"])
+PARCEL_FIELDS = [
+    "PARNO", "PARVAL", "SOURCEREF", "SADDNO", "SADDSTNAME", "SADDSTR", "SADDSTTYP",
+    "SCITY", "SITEADD", "OWNFRST", "OWNLAST", "OWNNAME", "MAILADD",
+]
+
+
+class ParcelIndex:
+    """Lookup maps for one county, built in a single pass over the GeoJSON features.
+
+    Every map points at the same per-feature record, so the five lookups cost one
+    copy of the parcel attributes instead of five. Normalizing SITEADD/MAILADD can
+    map different raw addresses to one key, so those two maps keep every record per
+    key and a key shared by different parcels is ambiguous, as ties are in
+    FuzzyAddressIndex.
+    """
+
+    def __init__(self, county_id):
+        self.county_id = county_id
+        self.site_address_lookup = {}
+        self.mailing_address_lookup = {}
+        self.parcel_lookup = {}
+        self.alt_parcel_lookup = {}
+        self.book_page_lookup = {}
+        self.fuzzy_address_index = FuzzyAddressIndex()
+
+    def add(self, properties, alt_parcel_id=None):
+        record = {field: properties.get(field) for field in PARCEL_FIELDS}
+
+        # Address keys go through the same normalizer as property_address queries
+        if record["SITEADD"]:
+            site_address_key = normalize_index_key(record["SITEADD"])
+            self.site_address_lookup.setdefault(site_address_key, []).append(record)
+            self.fuzzy_address_index.add(site_address_key, record)
+        if record["MAILADD"]:
+            self.mailing_address_lookup.setdefault(normalize_index_key(record["MAILADD"]), []).append(record)
+        if record["PARNO"]:
+            self.parcel_lookup[record["PARNO"]] = record
+        if alt_parcel_id:
+            self.alt_parcel_lookup[alt_parcel_id] = record
+
+        source_ref = record["SOURCEREF"]
+        if source_ref:
+            # Split SOURCEREF into book and page (e.g., "33649/924" -> "33649-924")
             try:
                 book, page = source_ref.split('/')
-                book = book.strip()
-                page = page.strip()
-                # Create a normalized key for comparison (e.g., "33649-924")
-                book_page_key = f"{book}-{page}"
-                
-                book_page_lookup[book_page_key] = {
-                    "PARNO": feature["properties"].get("PARNO"),
-                    "PARVAL": feature["properties"].get("PARVAL"),
-                    "SOURCEREF": source_ref,
-                    "SADDNO": feature["properties"].get("SADDNO"),
-                    "SADDSTNAME": feature["properties"].get("SADDSTNAME"),
-                    "SADDSTR": feature["properties"].get("SADDSTR"),
-                    "SADDSTTYP": feature["properties"].get("SADDSTTYP"),
-                    "SCITY": feature["properties"].get("SCITY"),
-                    "SITEADD": feature["properties"].get("SITEADD"),
-                    "OWNFRST": feature["properties"].get("OWNFRST"),
-                    "OWNLAST": feature["properties"].get("OWNLAST"),
-                    "OWNNAME": feature["properties"].get("OWNNAME"),
-                    "MAILADD": feature["properties"].get("MAILADD"),
-                }
+                self.book_page_lookup[f"{book.strip()}-{page.strip()}"] = record
             except ValueError:
                 logger.warning(f"Invalid SOURCEREF format: {source_ref}")
-                continue
 
-        time.sleep(2)
-        return book_page_lookup
-    except Exception as e:
-        logger.info(f"[ERROR IN BOOK NO MAPPING:] {str(e)}")
-        return None
+    @classmethod
+    def from_geojson(cls, county_id, geojson_file):
+        index = cls(county_id)
+        for feature in geojson_file.get("features", []):
+            properties = feature.get("properties") or {}
+            index.add(properties, properties.get("ALTPARNO"))
+        index.log_summary()
+        return index
+
+    @classmethod
+    def from_table(cls, county_id, table):
+        index = cls(county_id)
+        # Batches are zero-copy slices of the mapped table, so only one batch's rows
+        # are ever held as Python values besides the records
+        for batch in table.to_batches(max_chunksize=PARCEL_BATCH_SIZE):
+            for properties in batch.to_pylist():
+                index.add(properties, properties.get("ALTPARNO"))
+        index.log_summary()
+        return index
+
+    def log_summary(self):
+        logger.info(
+            f"[PARCEL INDEX BUILT] county {self.county_id}: {len(self.site_address_lookup)} site, "
+            f"{len(self.mailing_address_lookup)} mailing, {len(self.parcel_lookup)} parcel, "
+            f"{len(self.alt_parcel_lookup)} alt parcel, {len(self.book_page_lookup)} book/page keys, "
+            f"{len(self.fuzzy_address_index)} fuzzy site addresses"
+        )
 
-def map_with_mailing_address(geojson_file):
-    try:
-        mailing_address_lookup = {
-            feature["properties"]["MAILADD"]: {
-                "PARNO":feature["properties"].get("PARNO"),
-                "PARVAL": feature["properties"].get("PARVAL"),
-                "SOURCEREF": feature["properties"].get("SOURCEREF"),
-                "SADDNO": feature["properties"].get("SADDNO"),
-                "SADDSTNAME": feature["properties"].get("SADDSTNAME"),
-                "SADDSTTYP": feature["properties"].get("SADDSTTYP"),
-                "SADDSTR": feature["properties"].get("SADDSTR"),
-                "SCITY": feature["properties"].get("SCITY"),
-                "SITEADD": feature["properties"].get("SITEADD"),
-                "OWNFRST": feature["properties"].get("OWNFRST"),
-                "OWNLAST": feature["properties"].get("OWNLAST"),
-                "OWNNAME": feature["properties"].get("OWNNAME"),
-                "MAILADD": feature["properties"].get("MAILADD"),
-            }
-            for feature in geojson_file.get("features", [])
-            if feature["properties"].get("MAILADD")
-        }
-        return mailing_address_lookup
-    except Exception as e:
-        return None
+    @staticmethod
+    def find_unique(lookup, address_key, label):
+        """The record for an address key, or None if it is missing or shared by different parcels"""
+        records = lookup.get(address_key)
+        if not records:
+            return None
+        parcel_numbers = {record["PARNO"] for record in records}
+        if len(records) > 1 and len(parcel_numbers) > 1:
+            logger.warning(f"[{label} AMBIGUOUS] {address_key} matches parcels {sorted(map(str, parcel_numbers))}")
+            return None
+        return records[0]
 
-def map_with_site_address(geojson_file):
-    try:
-        mailing_address_lookup = {
-            feature["properties"]["SITEADD"]: {
-                "PARNO":feature["properties"].get("PARNO"),
-                "PARVAL": feature["properties"].get("PARVAL"),
-                "SOURCEREF": feature["properties"].get("SOURCEREF"),
-                "SADDNO": feature["properties"].get("SADDNO"),
-                "SADDSTNAME": feature["properties"].get("SADDSTNAME"),
-                "SADDSTTYP": feature["properties"].get("SADDSTTYP"),
-                "SADDSTR": feature["properties"].get("SADDSTR"),
-                "SCITY": feature["properties"].get("SCITY"),
-                "SITEADD": feature["properties"].get("SITEADD"),
-                "OWNFRST": feature["properties"].get("OWNFRST"),
-                "OWNLAST": feature["properties"].get("OWNLAST"),
-                "OWNNAME": feature["properties"].get("OWNNAME"),
-                "MAILADD": feature["properties"].get("MAILADD"),
-            }
-            for feature in geojson_file.get("features", [])
-            if feature["properties"].get("SITEADD")
-        }
-        return mailing_address_lookup
-    except Exception as e:
-        return None
+    def find_by_site_address(self, address_key):
+        return self.find_unique(self.site_address_lookup, address_key, "SITE ADDRESS")
 
-import re
+    def find_by_mailing_address(self, address_key):
+        return self.find_unique(self.mailing_address_lookup, address_key, "MAILING ADDRESS")
 
-def extract_mailing_address(address):
-    # # Normalize address by removing commas and trimming
-    # address = address.replace(",", "").strip()
+    def find_by_parcel_id(self, parcel_id):
+        return self.parcel_lookup.get(parcel_id) or self.alt_parcel_lookup.get(parcel_id)
 
-    # Directional keywords
-    directional_keywords = [
-        "Northeast", "North East", "NE",
-        "Northwest", "North West", "NW",
-        "Southeast", "South East", "SE",
-        "Southwest", "South West", "SW",
-    ]
 
-    # Street type keywords
-    street_keywords = [
-        "Drive", "Dr", "Avenue", "Ave", "Road", "Rd", "Parkway", "Pkwy",
-        "Court", "Ct", "Street", "St", "Boulevard", "Blvd", "Lane", "Ln",
-        "Highway", "Hwy", "Apartment", "Apt", "Unit", "Suite", "Ste","Circle","Cir",
-        "Extension", "EXT", "Ext","Place","Pl",
-    ]
-    
-    if not ',' in address or address.count(',')==1:
-        # 1. Check for directional keywords
-        for keyword in directional_keywords:
-            if keyword in address:
-                parts = address.split()
-                for i in range(len(parts)):
-                    if parts[i] == keyword:
-                        return " ".join(parts[:i+1])  # Include the keyword
-                # If partial match (like "SW" attached to street), fallback to regex
-                match = re.search(rf"(.*?\b{re.escape(keyword)}\b)", address)
-                if match:
-                    return match.group(1).strip()
-    
-        # 2. Check for street type keywords using regex
-        for keyword in street_keywords:
-            pattern = rf"(.*?\b{keyword}\b)"
-            match = re.search(pattern, address, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-    
-    
-    # Case 1: If comma exists, split at first comma
-    if ',' in address and not '.' in address:
-        return address.split(',')[0].strip()
-    
-    if '.' in address and address.count(',') > 1:
-        return address.split(',')[0].strip()
-    if '.' in address:
-        return address.split('.')[0].strip()
-    # Fallback: return full address
-
-
-    # 3. Fallback to full address if nothing matched
-    return address.strip()
-
-def normalize_address_keywords(address):
-    replacements = {
-        r'\bDrive\b': 'Dr',
-        r'\bAvenue\b': 'Ave',
-        r'\bRoad\b': 'Rd',
-        r'\bParkway\b': 'Pkwy',
-        r'\bCourt\b': 'Ct',
-        r'\bStreet\b': 'St',
-        r'\bBoulevard\b': 'Blvd',
-        r'\bLane\b': 'Ln',
-        r'\bHighway\b': 'Hwy',
-        r'\bApartment\b': 'Apt',
-        r'\bUnit\b': 'Unit',
-        r'\bSuite\b': 'Ste',
-        r'\bNortheast\b': 'NE',
-        r'\bNorth East\b': 'NE',
-        r'\bNorthwest\b': 'NW',
-        r'\bNorth West\b': 'NW',
-        r'\bSoutheast\b': 'SE',
-        r'\bSouth East\b': 'SE',
-        r'\bSouthwest\b': 'SW',
-        r'\bSouth West\b': 'SW',
-        r'\bPlace\b': 'PL',
-        r'\bExtension\b': 'EXT',
-        r'\bCircle\b': 'CIR',
-        r'\bNorth\b': 'N',
-        r'\bSouth\b': 'S',
-        r'\bWest\b': 'W',
-        r'\bEast\b': 'E'
-    }
+def load_parcel_index(county_id):
+    """Returns the ParcelIndex for a county, or None if its GeoJSON is unavailable"""
+    parcel_table = get_parcel_table(county_id)
+    if parcel_table is None:
+        logger.warning(f"[GEOJSON NOT AVAILABLE] for county {county_id}")
+        return None
+    return ParcelIndex.from_table(county_id, parcel_table)
 
-    for pattern, replacement in replacements.items():
-        address = re.sub(pattern, replacement, address, flags=re.IGNORECASE)
-    address.replace('.','')
-    return address.upper()
+def group_cases_by_county(parcel_details):
+    """Yields (county_id, cases) for a case stream already ordered by odyssey county suffix"""
+    for county_id, entries in groupby(parcel_details, key=lambda entry: entry["case_number"][-3:]):
+        yield county_id, list(entries)
 
-def get_property_info():
+def oldest_change(entries):
+    """Earliest changed_at among the cases, or None"""
+    return min((entry["changed_at"] for entry in entries if entry.get("changed_at")), default=None)
+
+def get_worker_count():
+    """Number of county worker processes, defaults to the Batch container vCPUs"""
+    try:
+        return max(1, int(float(os.getenv("EQUITY_WORKERS", os.cpu_count() or 1))))
+    except ValueError:
+        return 1
 
+def process_county_cases(county_id, entries):
+    """Matches one county's cases against its parcel index. Runs inside a worker process."""
     engine = get_db_connection()
-    # Convert result to a dictionary list
-    parcel_details = get_parcel_numbers(engine)
-    logger.info(f"COUNTS: {len(parcel_details)}")
+    try:
+        return match_county_cases(county_id, entries, engine)
+    finally:
+        if engine is not None:
+            engine.dispose()
+
+def match_county_cases(county_id, entries, engine):
+    writer = EquityResultWriter(engine)
+    try:
+        parcel_index = load_parcel_index(county_id)
+    except Exception as e:
+        # Only this county's cases go without an index; they fail one by one below
+        logger.error(f"[PARCEL INDEX FAILED] for county {county_id}: {str(e)}")
+        parcel_index = None
+    logger.info(f"[COUNTY {county_id}] PROCESSING {len(entries)} CASES")
 
     c=1
     failed_cases = []
+    errored_cases = []
     # --- Match and Extract LANDVAL ---
-    for entry in parcel_details:
+    for entry in entries:
 
         try:
 
@@ -480,13 +385,13 @@ def get_property_info():
             deed_page_number = entry["deed_page_number"]
             # owner_name = ""
             logger.info(f"\n{c}.Processing case no {case_number}, parcel id {parcel_id}, property address: {property_address}, amount owed: {amount_owed}, deed book: {deed_book_number}, deed page: {deed_page_number}")
-            county_id = case_number[-3:]
-
             logger.info(f"COUNTY ID: {county_id}")
 
-            geojson_file = get_geojson(county_id)
+            if parcel_index is None:
+                raise ValueError(f"Parcel index not available for county {county_id}")
 
             updated = False
+            normalized_address = None
 
             # First: Lookup with property address
             if property_address:
@@ -496,18 +401,14 @@ def get_property_info():
                 logger.info(f"EXTRACTED STREET ADDRESS: {extracted_mailing_address}")
                 normalized_address = normalize_address_keywords(extracted_mailing_address)
 
-                if county_id in ['590','640','180']:
-                    normalized_address = re.sub(r'^(\d+)(\s+)', r'\1  ', normalized_address)
+                if county_id in DOUBLE_SPACE_COUNTIES:
+                    normalized_address = DOUBLE_SPACE_HOUSE_NUMBER.sub(r'\1  ', normalized_address)
 
                 logger.info(f"NORMALIZED ADDRESS: {normalized_address}")
 
                 #Step1: Try with Site Address
-                site_address_lookup_data = map_with_site_address(geojson_file)
-                if not isinstance(site_address_lookup_data, dict):
-                    logger.warning("[LOOKUP FAILED] site_address_lookup_data is not a valid dictionary")
-
                 logger.info("1.STARTED SITE ADD MAPPING....")
-                siteadd_property_val = site_address_lookup_data.get(normalized_address)
+                siteadd_property_val = parcel_index.find_by_site_address(normalized_address)
                 logger.info("ENDED SITE MAPPING!")
                 
                 if siteadd_property_val:
@@ -515,7 +416,7 @@ def get_property_info():
 
                     try:
                         updated = True
-                        db_insert = update_db(siteadd_property_val, entry, engine)
+                        db_insert = update_db(siteadd_property_val, entry, writer, "SITEADD")
                         if db_insert:
                             updated = True
                         else:
@@ -527,20 +428,15 @@ def get_property_info():
                     logger.warning("SITE ADDRESS NOT MATCHED")
                 #Step2: Try with Mailing Address
                 if not updated:
-                    mailing_address_lookup_data = map_with_mailing_address(geojson_file)
-                    
-                    if not isinstance(mailing_address_lookup_data, dict):
-                        logger.warning("[LOOKUP FAILED] mailing_address_lookup_data is not a valid dictionary")
-                    
                     logger.info("2.MAPPING WITH MAILING ADDRESS....")
-                    mailadd_property_val = mailing_address_lookup_data.get(normalized_address)
+                    mailadd_property_val = parcel_index.find_by_mailing_address(normalized_address)
                     logger.info("ENDED MAIL MAPPING!")
                     
                     if mailadd_property_val:
                         logger.info("MAILING ADDRESS MATCHED!")
                         try:
                             updated = True
-                            db_insert = update_db(mailadd_property_val, entry, engine)
+                            db_insert = update_db(mailadd_property_val, entry, writer, "MAILADD")
                             if db_insert:
                                 updated = True
                             else:
@@ -557,24 +453,17 @@ def get_property_info():
                 # Second: Lookup with Parcel ID
                 if parcel_id:
                     logger.info("3.[MAPPING] with Parcel ID...")
-                    parcel_lookup_data = map_with_parcel_id(geojson_file)
-                    time.sleep(2)
-
-                    geojson_data = parcel_lookup_data.get('data','')
-                    parcel_lookup = geojson_data.get('parcel_lookup','')
-                    alt_parcel_lookup = geojson_data.get('alt_parcel_lookup','')
 
-                    if parcel_id in parcel_lookup or parcel_id in alt_parcel_lookup:
-                        property_val = parcel_lookup.get(parcel_id) or alt_parcel_lookup.get(parcel_id)
+                    property_val = parcel_index.find_by_parcel_id(parcel_id)
+                    if property_val:
                         logger.info("PARCEL ID MATCHED!")
 
-                        if property_val:
+                        updated = True
+                        db_insert = update_db(property_val, entry, writer, "PARNO")
+                        if db_insert:   
                             updated = True
-                            db_insert = update_db(property_val, entry, engine)
-                            if db_insert:   
-                                updated = True
-                            if not db_insert:
-                                raise ValueError("DB UPDATE FAILED")
+                        if not db_insert:
+                            raise ValueError("DB UPDATE FAILED")
 
                     else:
                         logger.warning(f"\n[NOT FOUND]Parcel ID {parcel_id} in JSON")
@@ -585,23 +474,18 @@ def get_property_info():
                 # Third: Lookup with Deed Book and Page Number
                 if deed_book_number and deed_page_number:
                     logger.info("4.[MAPPING] with Deed Book and Page Number...")
-                    book_page_lookup_data = map_with_book_page_no(geojson_file)
-                    time.sleep(2)
-
-                    if not isinstance(book_page_lookup_data, dict):
-                        logger.warning("[LOOKUP FAILED] book_page_lookup_data is not a valid dictionary")
 
                     # Combine book and page number to match SOURCEREF format (e.g., "33649-924")
                     source_ref = f"{deed_book_number}-{deed_page_number}"
                     logger.info(f"Constructed SOURCEREF: {source_ref}")
 
-                    book_page_property_val = book_page_lookup_data.get(source_ref)
+                    book_page_property_val = parcel_index.book_page_lookup.get(source_ref)
 
                     if book_page_property_val:
                         logger.info("DEED BOOK AND PAGE NUMBER MATCHED!")
                         try:
                             updated = True
-                            db_insert = update_db(book_page_property_val, entry, engine)
+                            db_insert = update_db(book_page_property_val, entry, writer, "SOURCEREF")
                             if db_insert:
                                 updated = True
                             else:
@@ -613,9 +497,28 @@ def get_property_info():
                 else:
                     logger.warning("DEED BOOK OR PAGE NUMBER IS EMPTY")
 
+            if not updated and normalized_address:
+                # Last: Closest site address by house number and street tokens
+                logger.info("5.[MAPPING] with FUZZY SITE ADDRESS...")
+                fuzzy_property_val, match_score = parcel_index.fuzzy_address_index.search(normalized_address)
+                if fuzzy_property_val:
+                    logger.info(f"FUZZY SITE ADDRESS MATCHED! {fuzzy_property_val.get('SITEADD')} SCORE: {match_score}")
+                    try:
+                        updated = True
+                        db_insert = update_db(fuzzy_property_val, entry, writer, "FUZZY_SITEADD", match_score)
+                        if db_insert:
+                            updated = True
+                        else:
+                            raise ValueError("DB UPDATE FAILED")
+                    except Exception as e:
+                        logger.error(f"Exception during DB update: {e}")
+                else:
+                    logger.warning(f"[FUZZY SITE ADDRESS NOT MATCHED] best score {match_score}")
+
             if not updated:
                 logger.warning("PROPERTY ADDRESS, PARCEL ID, AND DEED BOOK/PAGE NOT MATCHED")
-                failed_cases.append({"case_number": case_number, "failed_reason": 'PROPERTY ADDRESS, PARCEL ID, AND DEED BOOK/PAGE NOT MATCHED'})
+                failed_cases.append(case_number)
+                writer.add_failure(case_number, 'PROPERTY ADDRESS, PARCEL ID, AND DEED BOOK/PAGE NOT MATCHED')
             # if not updated:
             #     #Third: Lookup with Owner name
             #     if owner_name:
@@ -629,77 +532,318 @@ def get_property_info():
             #             return {"success":True}
             #     else:
         except Exception as e:
+            # Neither matched nor marked failed, so a later run must pick it up again
+            errored_cases.append(entry["case_number"])
             logger.error(f"[PROPERTY EXTRACTION FAILED]: {str(e)}")
 
         c+=1
     
-    logger.info(f"FAILED CASES: {failed_cases}")
-    # Updating Failed Cases
-    for case in failed_cases:
-        metadata = MetaData(schema=SCHEMA_NAME)
-        property_info = Table(
-            "property_info", metadata,
-            Column("case_number", String),
-            Column("ncmap_updated", Boolean),
-            Column("manual_review", Boolean),
-            Column("manual_review_reason", String)
+    logger.info(f"[COUNTY {county_id}] FAILED CASES: {failed_cases}")
+    flushed = writer.flush()
+    if writer.unwritten:
+        logger.error(f"[COUNTY {county_id}] RESULTS NOT WRITTEN FOR: {writer.unwritten}")
+    unwritten = set(errored_cases) | set(writer.unwritten)
+    return {
+        "county_id": county_id, "processed": len(entries), "failed": len(failed_cases),
+        "errored": len(errored_cases), "flushed": flushed and not writer.unwritten,
+        "unwritten": writer.unwritten,
+        "unwritten_since": oldest_change(entry for entry in entries if entry["case_number"] in unwritten),
+    }
+
+# Columns this job writes to property_info beyond the original schema; added once
+# per schema by migrate_equity_columns.py, never by the job itself
+EQUITY_COLUMNS = [
+    ("ncmap_match_method", "TEXT"),
+    ("ncmap_match_score", "NUMERIC(4,3)"),
+]
+
+def check_equity_columns(engine):
+    """Raises if property_info lacks EQUITY_COLUMNS, since every write-back batch would fail"""
+    property_info, _ = get_equity_tables(engine)
+    missing = [column_name for column_name, _ in EQUITY_COLUMNS if column_name not in property_info.c]
+    if missing:
+        raise RuntimeError(
+            f"property_info is missing columns {missing}; run migrate_equity_columns.py before this job"
         )
+
+_equity_tables = {}
+
+def get_equity_tables(engine):
+    """Reflects property_info and tax_info once per process"""
+    if not _equity_tables:
+        metadata = MetaData(schema=SCHEMA_NAME)
+        RDS_PACER.wait()
+        _equity_tables["property_info"] = Table("property_info", metadata, autoload_with=engine)
+        _equity_tables["tax_info"] = Table("tax_info", metadata, autoload_with=engine)
+    return _equity_tables["property_info"], _equity_tables["tax_info"]
+
+class EquityResultWriter:
+    """Buffers matched and failed equity results and writes them back in batches.
+
+    Each flush issues one multi-row UPDATE ... FROM (VALUES ...) per table instead
+    of a transaction per case. A batch that fails is retried in halves down to
+    single rows, so one bad row only loses itself; the case numbers that still
+    could not be written are collected in ``unwritten`` and the flush returns False.
+    """
+
+    def __init__(self, engine, batch_size=None):
+        self.engine = engine
+        self.batch_size = batch_size or int(os.getenv("EQUITY_FLUSH_SIZE", "500"))
+        self.matched = []
+        self.failed = []
+        self.unwritten = []
+        self.property_info, self.tax_info = get_equity_tables(engine)
+
+    def add_match(self, row):
+        self.matched.append(row)
+        if len(self.matched) >= self.batch_size:
+            self.flush_matched()
+
+    def add_failure(self, case_number, failed_reason):
+        self.failed.append({"case_number": case_number, "failed_reason": failed_reason})
+        if len(self.failed) >= self.batch_size:
+            self.flush_failed()
+
+    def flush(self):
+        matched_ok = self.flush_matched()
+        failed_ok = self.flush_failed()
+        return matched_ok and failed_ok
+
+    def write_batch(self, rows, build_statements, label):
+        """Runs build_statements(rows) in one transaction, splitting the batch on failure"""
         try:
-            if case.get('case_number') and case.get('failed_reason'):
-                with engine.begin() as conn:  # engine.begin() ensures commit at the end
-                    updt_stmt = (
-                        update(property_info)
-                        .where(property_info.c.case_number == case['case_number'])
-                        .values(
-                            ncmap_updated=False,
-                            manual_review=True,
-                            manual_review_reason=case['failed_reason']
-                        )
-                    )
-                    conn.execute(updt_stmt)
+            RDS_PACER.wait()
+            with self.engine.begin() as conn:
+                for stmt in build_statements(rows):
+                    conn.execute(stmt)
+            logger.info(f"[DB UPDATED SUCCESSFULLY!] {len(rows)} {label} CASES")
+            return True
         except Exception as e:
-            logger.error(f"Error updating failed case {case.get('case_number')}: {str(e)}")
-    logger.info("FAILED EQUITY CASES UPDATED IN DB")
+            # Splitting only helps against bad rows, not a lost connection
+            if len(rows) == 1 or isinstance(e, (sqlalchemy.exc.OperationalError, sqlalchemy.exc.InterfaceError)):
+                logger.error(f"[DB UPDATE FAILED] {label} CASES {[row['case_number'] for row in rows]}: {str(e)}")
+                self.unwritten.extend(row["case_number"] for row in rows)
+                return False
+            logger.warning(f"[DB UPDATE FAILED] for a batch of {len(rows)} {label} CASES, retrying in halves: {str(e)}")
+        middle = len(rows) // 2
+        first_ok = self.write_batch(rows[:middle], build_statements, label)
+        second_ok = self.write_batch(rows[middle:], build_statements, label)
+        return first_ok and second_ok
+
+    def flush_matched(self):
+        if not self.matched:
+            return True
+        rows, self.matched = self.matched, []
+        return self.write_batch(rows, self.matched_statements, "MATCHED")
+
+    def matched_statements(self, rows):
+        property_info, tax_info = self.property_info, self.tax_info
+
+        matched = values(
+            column("case_number", String),
+            column("assessed_value", Numeric),
+            column("ncmap_owner_name", String),
+            column("ncmap_owner_first_name", String),
+            column("ncmap_owner_last_name", String),
+            column("ncmap_owner_mailing_address", String),
+            column("equity", Numeric),
+            column("equity_status", String),
+            column("ncmap_parcel_number", String),
+            column("ncmap_match_method", String),
+            column("ncmap_match_score", Numeric),
+            column("manual_review", Boolean),
+            column("manual_review_reason", String),
+            name="matched",
+        ).data([
+            (
+                row["case_number"], row["assessed_value"], row["ncmap_owner_name"],
+                row["ncmap_owner_first_name"], row["ncmap_owner_last_name"],
+                row["ncmap_owner_mailing_address"], row["equity"], row["equity_status"],
+                row["ncmap_parcel_number"], row["ncmap_match_method"], row["ncmap_match_score"],
+                row["manual_review"], row["manual_review_reason"],
+            )
+            for row in rows
+        ])
+        now = datetime.now()
+
+        # Cast to the reflected column types so all-NULL VALUES columns still assign
+        def typed(table, name):
+            return cast(matched.c[name], table.c[name].type)
+
+        update_property_info = (
+            update(property_info)
+            .where(property_info.c.case_number == matched.c.case_number)
+            .values(
+                assessed_value=typed(property_info, "assessed_value"),
+                ncmap_owner_name=typed(property_info, "ncmap_owner_name"),
+                ncmap_owner_first_name=typed(property_info, "ncmap_owner_first_name"),
+                ncmap_owner_last_name=typed(property_info, "ncmap_owner_last_name"),
+                ncmap_owner_mailing_address=typed(property_info, "ncmap_owner_mailing_address"),
+                equity=typed(property_info, "equity"),
+                ncmap_updated=True,
+                skip_trace_status=None,
+                equity_status=typed(property_info, "equity_status"),
+                ncmap_parcel_number=typed(property_info, "ncmap_parcel_number"),
+                ncmap_match_method=typed(property_info, "ncmap_match_method"),
+                ncmap_match_score=typed(property_info, "ncmap_match_score"),
+                manual_review=typed(property_info, "manual_review"),
+                manual_review_reason=func.coalesce(
+                    typed(property_info, "manual_review_reason"), property_info.c.manual_review_reason
+                ),
+                last_updated_at=now,
+            )
+        )
+        update_tax_info = (
+            update(tax_info)
+            .where(tax_info.c.case_number == matched.c.case_number)
+            .values(
+                assessed_value=typed(tax_info, "assessed_value"),
+                manual_review=False,
+                equity=typed(tax_info, "equity"),
+                equity_status=typed(tax_info, "equity_status"),
+                last_updated_at=now,
+            )
+        )
+        return [update_property_info, update_tax_info]
 
+    def flush_failed(self):
+        rows = [case for case in self.failed if case.get('case_number') and case.get('failed_reason')]
+        self.failed = []
+        if not rows:
+            return True
+        return self.write_batch(rows, self.failed_statements, "FAILED EQUITY")
+
+    def failed_statements(self, rows):
+        property_info = self.property_info
+
+        failed = values(
+            column("case_number", String),
+            column("failed_reason", String),
+            name="failed",
+        ).data([(case["case_number"], case["failed_reason"]) for case in rows])
+
+        updt_stmt = (
+            update(property_info)
+            .where(property_info.c.case_number == failed.c.case_number)
+            .values(
+                ncmap_updated=False,
+                manual_review=True,
+                manual_review_reason=failed.c.failed_reason
+            )
+        )
+        return [updt_stmt]
 
-def update_db(property_val,entry,engine):
+def get_property_info():
+    """Matches pending cases county by county.
+
+    Unless EQUITY_FULL_RUN is set, only cases changed at or after the saved high water
+    mark are read. The mark only moves past cases that were written back: it stops at
+    the oldest case that errored (e.g. its county's GeoJSON is missing), lost its
+    write or belonged to a failed county, and does not move at all if the case
+    stream broke off or a flush failed. A retried Batch attempt resumes naturally:
+    cases already written back no longer match ncmap_updated IS NULL.
+    """
+    engine = get_db_connection()
+    try:
+        check_equity_columns(engine)
+    except Exception:
+        engine.dispose()
+        raise
+
+    since = None if EQUITY_FULL_RUN else get_high_water_mark(engine)
+    logger.info(f"[INCREMENTAL RUN] since {since}" if since else "[FULL RUN]")
+
+    case_count = county_count = 0
+    newest_change = since
+    oldest_unwritten = None
+    completed = True
+    def track(parcel_details):
+        nonlocal case_count, newest_change
+        for entry in parcel_details:
+            case_count += 1
+            changed_at = entry.get("changed_at")
+            if changed_at and (newest_change is None or changed_at > newest_change):
+                newest_change = changed_at
+            yield entry
+
+    def hold_back(changed_at):
+        nonlocal oldest_unwritten
+        if changed_at and (oldest_unwritten is None or changed_at < oldest_unwritten):
+            oldest_unwritten = changed_at
+
+    def record(county_id, result):
+        nonlocal completed
+        logger.info(f"[COUNTY {county_id}] DONE: {result}")
+        if not result["flushed"]:
+            completed = False
+        hold_back(result["unwritten_since"])
 
-    metadata = MetaData(schema=SCHEMA_NAME)
+    try:
+        county_stream = group_cases_by_county(track(get_parcel_numbers(engine, since)))
+        workers = get_worker_count()
+        if workers <= 1:
+            for county_id, entries in county_stream:
+                county_count += 1
+                try:
+                    record(county_id, process_county_cases(county_id, entries))
+                except Exception as e:
+                    hold_back(oldest_change(entries))
+                    logger.error(f"[COUNTY {county_id}] FAILED: {str(e)}")
+        else:
+            logger.info(f"RUNNING COUNTIES ON {workers} WORKERS")
+            # Spawned workers don't inherit the open streaming cursor's connection
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = {}
+                def collect(done):
+                    for future in done:
+                        county_id, county_oldest_change = futures.pop(future)
+                        try:
+                            record(county_id, future.result())
+                        except Exception as e:
+                            hold_back(county_oldest_change)
+                            logger.error(f"[COUNTY {county_id}] WORKER FAILED: {str(e)}")
+                for county_id, entries in county_stream:
+                    # At most one county per worker in flight, so the cursor is only read as fast as counties finish
+                    if len(futures) >= workers:
+                        collect(wait(futures, return_when=FIRST_COMPLETED).done)
+                    county_count += 1
+                    futures[executor.submit(process_county_cases, county_id, entries)] = (county_id, oldest_change(entries))
+                collect(wait(futures).done)
+    except Exception as e:
+        completed = False
+        logger.error(f"Error fetching parcel numbers: {e}")
 
-    property_info = Table(
-            "property_info", metadata,
-            Column("case_number", String),
-            Column("assessed_value", Integer),
-            Column("parcel_or_tax_id", String),
-            Column("ncmap_owner_name",String),
-            Column("ncmap_owner_first_name",String),
-            Column("ncmap_owner_last_name",String),
-            Column("ncmap_owner_mailing_address",String),
-            Column("equity",Integer),
-            Column("skip_trace_status",String),
-            Column("last_updated_at", Date),
-            Column("ncmap_updated",Boolean),
-            Column("equity_status",String),
-            Column("ncmap_parcel_number",String),
-            autoload_with=engine
-    )
+    logger.info(f"COUNTS: {case_count} cases in {county_count} counties")
+    if oldest_unwritten:
+        logger.info(f"[CHECKPOINT HELD BACK] to {oldest_unwritten} for cases not written back")
+    high_water_mark = oldest_unwritten or newest_change
+    if completed and high_water_mark and high_water_mark != since:
+        save_high_water_mark(engine, high_water_mark)
+    engine.dispose()
 
-    tax_info = Table(
-        "tax_info",metadata,
-        Column("case_number",String),
-        Column("equity",Integer),
-        Column("last_updated_at", Date),
-        Column("equity_status",String),
-        Column("manual_review",String),
-        autoload_with=engine
-    )
+
+def to_decimal(value):
+    """PARVAL as a Decimal, so it subtracts cleanly from the Numeric amount_owed"""
+    if value is None:
+        return None
+    try:
+        number = Decimal(str(value).replace(",", "").strip())
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() else None
+
+# Match methods whose parcel is written back but flagged for a person to confirm
+REVIEW_MATCH_METHODS = {"FUZZY_SITEADD"}
+
+def update_db(property_val,entry,writer,match_method=None,match_score=1.0):
+    """Computes the equity for a matched case and queues its update on the writer"""
 
     parcel_id = entry["parcel_id"]#.replace("-", "")
     case_number = entry["case_number"]
     amount_owed = entry["amount_owed"]
 
     extracted_parcel_id = property_val.get('PARNO','')
-    assessed_value = property_val["PARVAL"]
+    assessed_value = to_decimal(property_val["PARVAL"])
     book_and_page_no = property_val["SOURCEREF"]
     st_addr_no = property_val["SADDNO"]
     st_name = property_val["SADDSTNAME"]
@@ -775,36 +919,28 @@ def update_db(property_val,entry,engine):
                         
     logger.info(f"[EQUITY STATUS]: {equity_status}")
 
-    #Update DB
-    try:
-        with engine.connect() as conn:
-            update_property_info = update(property_info).where(property_info.c.case_number == case_number).values(
-                assessed_value= assessed_value,
-                ncmap_owner_name = owner_full_name,
-                ncmap_owner_first_name = owner_first_name,
-                ncmap_owner_last_name = owner_last_name,
-                ncmap_owner_mailing_address = mailing_address,
-                equity = equity,
-                ncmap_updated = True,
-                skip_trace_status = None,
-                equity_status = equity_status,
-                ncmap_parcel_number = extracted_parcel_id,
-                last_updated_at = datetime.now()
-            )
-
-            conn.execute(update_property_info)
-
-            update_tax_info = update(tax_info).where(tax_info.c.case_number == case_number).values(assessed_value=assessed_value,manual_review=False,equity=equity,equity_status = equity_status,last_updated_at = datetime.now())
-
-            conn.execute(update_tax_info)
-
-            conn.commit()
-
-            logger.info("[DB UPDATED SUCCESSFULLY!]")
-            return True
-    except Exception as e:
-        logger.error(f"[DB UPDATE FAILED]: {str(e)}")
-        return False
+    manual_review = match_method in REVIEW_MATCH_METHODS
+    manual_review_reason = None
+    if manual_review:
+        manual_review_reason = f"{match_method} MATCH {full_address} (SCORE {match_score}), CONFIRM PARCEL"
+        logger.info(f"[MANUAL REVIEW]: {manual_review_reason}")
+
+    writer.add_match({
+        "case_number": case_number,
+        "assessed_value": assessed_value,
+        "ncmap_owner_name": owner_full_name,
+        "ncmap_owner_first_name": owner_first_name,
+        "ncmap_owner_last_name": owner_last_name,
+        "ncmap_owner_mailing_address": mailing_address,
+        "equity": equity,
+        "equity_status": equity_status,
+        "ncmap_parcel_number": extracted_parcel_id,
+        "ncmap_match_method": match_method,
+        "ncmap_match_score": match_score,
+        "manual_review": manual_review,
+        "manual_review_reason": manual_review_reason,
+    })
+    return True
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,29 @@
+"""One-off migration adding the property_info columns equity_finding writes.
+
+Run once per schema, with a role allowed to ALTER property_info, before deploying
+an equity_finding that records match methods:
+
+    SCHEMA=vivid-dev-schema python migrate_equity_columns.py
+
+Re-running it is harmless; columns that already exist are left alone.
+"""
+from sqlalchemy import text
+
+from equity_finding import EQUITY_COLUMNS, SCHEMA_NAME, get_db_connection, logger
+
+
+def migrate(engine):
+    with engine.begin() as conn:
+        for column_name, column_type in EQUITY_COLUMNS:
+            conn.execute(text(
+                f'ALTER TABLE "{SCHEMA_NAME}"."property_info" ADD COLUMN IF NOT EXISTS "{column_name}" {column_type}'
+            ))
+            logger.info(f"[MIGRATED] property_info.{column_name} {column_type}")
+
+
+if __name__ == "__main__":
+    engine = get_db_connection()
+    try:
+        migrate(engine)
+    finally:
+        engine.dispose()
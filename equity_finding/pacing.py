@@ -0,0 +1,38 @@
+import os
+import threading
+import time
+
+
+class Pacer:
+    """Enforces a minimum interval between calls to one external service.
+
+    Only wrap real remote I/O (S3, RDS) with a pacer; lookups against in-memory
+    parcel indexes must never wait. An interval of 0 disables pacing.
+    """
+
+    def __init__(self, name, min_interval=0.0):
+        self.name = name
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def wait(self):
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def pacer_from_env(name, env_var, default=0.0):
+    try:
+        return Pacer(name, float(os.getenv(env_var, default)))
+    except ValueError:
+        return Pacer(name, default)
+
+
+S3_PACER = pacer_from_env("s3", "S3_MIN_INTERVAL_SECONDS")
+RDS_PACER = pacer_from_env("rds", "RDS_MIN_INTERVAL_SECONDS")
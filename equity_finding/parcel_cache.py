@@ -0,0 +1,155 @@
+import os
+
+import boto3
+import ijson
+import pyarrow as pa
+
+from logger_config import setup_logger
+from pacing import S3_PACER
+
+logger, _ = setup_logger()
+
+CACHE_DIR = os.getenv("PARCEL_CACHE_DIR", "geojson_cache")
+
+# Only the attributes the parcel lookups read; geometry is never kept
+PARCEL_COLUMNS = [
+    "PARNO", "ALTPARNO", "PARVAL", "SOURCEREF", "SADDNO", "SADDSTNAME", "SADDSTR",
+    "SADDSTTYP", "SCITY", "SITEADD", "OWNFRST", "OWNLAST", "OWNNAME", "MAILADD",
+]
+# Rows per record batch, both when features are written to the cache and when the
+# cached table is read back into Python
+PARCEL_BATCH_SIZE = int(os.getenv("PARCEL_BATCH_SIZE", "10000"))
+# Batches are written as they are parsed, so every batch needs the same schema:
+# PARVAL is a number and every other attribute is kept as text
+NUMERIC_COLUMNS = ["PARVAL"]
+PARCEL_SCHEMA = pa.schema([
+    (name, pa.float64() if name in NUMERIC_COLUMNS else pa.string()) for name in PARCEL_COLUMNS
+])
+
+
+def get_cache_path(county_id):
+    return os.path.join(CACHE_DIR, f"{county_id}_parcels.arrow")
+
+
+def iter_feature_properties(stream):
+    """Yields each feature's properties from a GeoJSON byte stream without loading the file.
+
+    Only the ``features.item.properties`` prefix is materialized; geometry is skipped
+    by the parser and never turned into Python objects.
+    """
+    for properties in ijson.items(stream, "features.item.properties", use_float=True):
+        yield properties or {}
+
+
+def iter_parcel_batches(properties_iter, batch_size=PARCEL_BATCH_SIZE):
+    """Projects feature properties down to PARCEL_COLUMNS, yielding record batches of
+    at most batch_size rows so only one batch is held as Python values at a time"""
+    columns = {name: [] for name in PARCEL_COLUMNS}
+    rows = 0
+    for properties in properties_iter:
+        for name in PARCEL_COLUMNS:
+            columns[name].append(properties.get(name))
+        rows += 1
+        if rows == batch_size:
+            yield build_parcel_batch(columns)
+            columns = {name: [] for name in PARCEL_COLUMNS}
+            rows = 0
+    if rows:
+        yield build_parcel_batch(columns)
+
+
+def to_number(value):
+    """float for numeric or numeric-looking values ("245,000"), None otherwise"""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def to_text(value):
+    """str for any value (an int SADDNO or PARNO included), None stays None"""
+    return None if value is None else str(value)
+
+
+def build_parcel_batch(columns):
+    """Builds a PARCEL_SCHEMA record batch from projected columns"""
+    arrays = []
+    for field in PARCEL_SCHEMA:
+        convert = to_number if field.name in NUMERIC_COLUMNS else to_text
+        arrays.append(pa.array([convert(v) for v in columns[field.name]], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=PARCEL_SCHEMA)
+
+
+def cache_schema(etag):
+    return PARCEL_SCHEMA.with_metadata({"etag": etag or ""})
+
+
+def build_parcel_table(batches, etag):
+    """Builds an in-memory Arrow table from record batches, tagging it with the source ETag"""
+    return pa.Table.from_batches(list(batches), schema=cache_schema(etag))
+
+
+def write_parcel_cache(county_id, batches, etag):
+    """Appends record batches to the county's cache file as they arrive, tagged with the source ETag"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = get_cache_path(county_id)
+    tmp_path = f"{path}.tmp"
+    rows = 0
+    try:
+        # Uncompressed so the file can be memory-mapped without a decode step
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, cache_schema(etag)) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    logger.info(f"[PARCEL CACHE WRITTEN] {path} ({rows} parcels)")
+
+
+def read_parcel_cache(county_id, etag):
+    """Returns the memory-mapped cached table, or None if it is missing or stale"""
+    path = get_cache_path(county_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        logger.warning(f"[PARCEL CACHE UNREADABLE] {path}: {e}")
+        return None
+
+    cached_etag = (table.schema.metadata or {}).get(b"etag", b"").decode()
+    if etag and cached_etag != etag:
+        logger.info(f"[PARCEL CACHE STALE] county {county_id}: {cached_etag} != {etag}")
+        return None
+    return table
+
+
+def load_parcel_table(county_id, bucket, s3_key):
+    """Returns the parcel attribute table for a county, refreshing the local cache from S3
+    when the object's ETag has changed. Returns None if the county file does not exist."""
+    s3 = boto3.client('s3', region_name="us-east-1")
+    try:
+        S3_PACER.wait()
+        etag = s3.head_object(Bucket=bucket, Key=s3_key)["ETag"].strip('"')
+    except s3.exceptions.ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+            logger.warning(f"[GEOJSON NOT FOUND] s3://{bucket}/{s3_key}")
+            return None
+        raise
+
+    table = read_parcel_cache(county_id, etag)
+    if table is not None:
+        logger.info(f"[PARCEL CACHE HIT] county {county_id} ({table.num_rows} parcels)")
+        return table
+
+    logger.info(f"Streaming s3://{bucket}/{s3_key} ...")
+    S3_PACER.wait()
+    response = s3.get_object(Bucket=bucket, Key=s3_key)
+    write_parcel_cache(county_id, iter_parcel_batches(iter_feature_properties(response['Body'])), etag)
+    return read_parcel_cache(county_id, etag)
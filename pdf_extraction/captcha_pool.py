@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("pdf_extraction_logger")
+
+# reCAPTCHA v2 tokens are valid for 120 seconds after they are solved
+CAPTCHA_TOKEN_TTL_SECONDS = int(os.getenv("CAPTCHA_TOKEN_TTL_SECONDS", "120"))
+# Time a token needs left to survive injection, the search submit and the result page
+CAPTCHA_MIN_REMAINING_SECONDS = int(os.getenv("CAPTCHA_MIN_REMAINING_SECONDS", "30"))
+# A replacement is solved once a ready token has this little usable life left
+CAPTCHA_REFRESH_SECONDS = int(os.getenv("CAPTCHA_REFRESH_SECONDS", "30"))
+CAPTCHA_WAIT_SECONDS = int(os.getenv("CAPTCHA_WAIT_SECONDS", "180"))
+# Failed solves back off from CAPTCHA_RETRY_DELAY_SECONDS, doubling up to the max;
+# after CAPTCHA_MAX_FAILURES failures in a row the pool gives up
+CAPTCHA_RETRY_DELAY_SECONDS = int(os.getenv("CAPTCHA_RETRY_DELAY_SECONDS", "5"))
+CAPTCHA_MAX_RETRY_DELAY_SECONDS = int(os.getenv("CAPTCHA_MAX_RETRY_DELAY_SECONDS", "60"))
+CAPTCHA_MAX_FAILURES = int(os.getenv("CAPTCHA_MAX_FAILURES", "5"))
+
+
+class CaptchaTokenPool:
+    """Solves CAPTCHA tokens ahead of the portal searches that will use them.
+
+    Demand is the keys callers reserve() for searches coming up plus the get() calls
+    waiting right now; a manager thread keeps min(size, demand) tokens ready or being
+    solved, so paid solves follow the searches instead of the run's length. A ready
+    token is replaced once it has less than CAPTCHA_REFRESH_SECONDS of usable life
+    left, and dropped once less than CAPTCHA_MIN_REMAINING_SECONDS of its lifetime is
+    left. Tokens are handed out oldest first. ``solve`` returns (token, message) like
+    solve_captcha.
+    """
+
+    def __init__(self, solve, size, ttl=CAPTCHA_TOKEN_TTL_SECONDS, min_remaining=CAPTCHA_MIN_REMAINING_SECONDS,
+                 refresh=CAPTCHA_REFRESH_SECONDS, max_failures=CAPTCHA_MAX_FAILURES):
+        self.solve = solve
+        self.size = max(1, size)
+        self.max_age = ttl - min_remaining
+        self.refresh_age = max(0, self.max_age - refresh)
+        self.max_failures = max_failures
+        self._tokens = deque()
+        self._reserved = set()
+        self._waiting = 0
+        self._in_flight = 0
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stopped = False
+        self._gave_up = False
+        self._last_error = None
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="captcha")
+        self._manager = threading.Thread(target=self._manage, name="captcha-manager", daemon=True)
+        self.stats = {"solved": 0, "failed": 0, "expired": 0, "served": 0}
+
+    def start(self):
+        self._manager.start()
+        return self
+
+    def reserve(self, keys):
+        """Announces searches coming up, e.g. the uncached cases next in the queue"""
+        with self._condition:
+            self._reserved.update(keys)
+            self._condition.notify_all()
+
+    def release(self, key):
+        """Withdraws a reservation that will not be used after all"""
+        with self._condition:
+            self._reserved.discard(key)
+
+    def _drop_expired(self):
+        now = time.monotonic()
+        while self._tokens and now - self._tokens[0][1] > self.max_age:
+            self._tokens.popleft()
+            self.stats["expired"] += 1
+
+    def _top_up_locked(self):
+        """Starts the solves demand calls for; returns seconds until it should look again, or None"""
+        if self._stopped or self._gave_up:
+            return None
+        self._drop_expired()
+        now = time.monotonic()
+        if now < self._retry_at:
+            return self._retry_at - now
+        demand = min(self.size, len(self._reserved) + self._waiting)
+        fresh_ages = [now - solved_at for _, solved_at in self._tokens if now - solved_at < self.refresh_age]
+        for _ in range(demand - len(fresh_ages) - self._in_flight):
+            self._in_flight += 1
+            self._executor.submit(self._solve_one)
+        if fresh_ages and demand:
+            # Wake when the oldest fresh token needs its replacement
+            return self.refresh_age - max(fresh_ages)
+        return None
+
+    def _manage(self):
+        with self._condition:
+            while not self._stopped:
+                self._condition.wait(self._top_up_locked())
+
+    def _solve_one(self):
+        try:
+            token, message = self.solve()
+        except Exception as e:
+            token, message = False, e
+        with self._condition:
+            self._in_flight -= 1
+            if token:
+                self._tokens.append((token, time.monotonic()))
+                self._failures = 0
+                self.stats["solved"] += 1
+            else:
+                self._last_error = message
+                self._failures += 1
+                self.stats["failed"] += 1
+                if self._failures >= self.max_failures:
+                    self._gave_up = True
+                else:
+                    delay = min(CAPTCHA_RETRY_DELAY_SECONDS * 2 ** (self._failures - 1), CAPTCHA_MAX_RETRY_DELAY_SECONDS)
+                    self._retry_at = max(self._retry_at, time.monotonic() + delay)
+            self._condition.notify_all()
+        if self._gave_up and not token:
+            logger.error(f"[CAPTCHA POOL] giving up after {self._failures} failed solves in a row: {message}")
+        elif not token:
+            logger.warning(f"[CAPTCHA POOL] solve failed: {message}")
+
+    def get(self, key=None, timeout=CAPTCHA_WAIT_SECONDS):
+        """Returns (token, message); token is False if none became ready within timeout.
+
+        ``key`` consumes the reservation made for this search, if any.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._reserved.discard(key)
+            self._waiting += 1
+            self._condition.notify_all()
+            try:
+                while True:
+                    self._drop_expired()
+                    if self._tokens:
+                        token, solved_at = self._tokens.popleft()
+                        self.stats["served"] += 1
+                        age = time.monotonic() - solved_at
+                        break
+                    remaining = deadline - time.monotonic()
+                    if self._gave_up:
+                        return False, f"CAPTCHA solving gave up after {self._failures} failures: {self._last_error}"
+                    if remaining <= 0 or self._stopped:
+                        return False, f"No CAPTCHA token ready after {timeout}s: {self._last_error}"
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+                self._condition.notify_all()
+        logger.info(f"[CAPTCHA POOL] token served, {age:.0f}s old")
+        return token, "Captcha Solved"
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info(f"[CAPTCHA POOL] stopped: {self.stats}")
@@ -0,0 +1,63 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+logger = logging.getLogger("pdf_extraction_logger")
+
+SCHEMA_NAME = os.getenv("SCHEMA", "vivid-dev-schema")
+
+metadata = MetaData(schema=SCHEMA_NAME)
+portal_case_ids = Table(
+    "portal_case_ids", metadata,
+    Column("case_number", String(50), primary_key=True),
+    Column("case_id", String, nullable=False),
+    Column("resolved_at", DateTime, nullable=False),
+)
+
+_table_lock = threading.Lock()
+_table_ready = False
+
+
+def ensure_case_id_table(engine):
+    global _table_ready
+    with _table_lock:
+        if not _table_ready:
+            portal_case_ids.create(engine, checkfirst=True)
+            _table_ready = True
+
+
+def load_case_ids(engine, case_numbers):
+    """Returns {case_number: portal case_id} for the case numbers resolved on earlier runs"""
+    ensure_case_id_table(engine)
+    case_ids = {}
+    with engine.connect() as conn:
+        for start in range(0, len(case_numbers), 1000):
+            batch = case_numbers[start:start + 1000]
+            rows = conn.execute(
+                select(portal_case_ids.c.case_number, portal_case_ids.c.case_id)
+                .where(portal_case_ids.c.case_number.in_(batch))
+            )
+            case_ids.update({row.case_number: row.case_id for row in rows})
+    return case_ids
+
+
+def save_case_id(engine, case_number, case_id):
+    ensure_case_id_table(engine)
+    stmt = insert(portal_case_ids).values(case_number=case_number, case_id=case_id, resolved_at=datetime.now())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["case_number"],
+        set_={"case_id": stmt.excluded.case_id, "resolved_at": stmt.excluded.resolved_at},
+    )
+    with engine.connect() as conn:
+        conn.execute(stmt)
+        conn.commit()
+
+
+def forget_case_id(engine, case_number):
+    with engine.connect() as conn:
+        conn.execute(delete(portal_case_ids).where(portal_case_ids.c.case_number == case_number))
+        conn.commit()
@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime
+
+from botocore.exceptions import ClientError
+from sqlalchemy import BigInteger, Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.dialects.postgresql import insert
+
+logger = logging.getLogger("pdf_extraction_logger")
+
+SCHEMA_NAME = os.getenv("SCHEMA", "vivid-dev-schema")
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "pdf_cache")
+PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", "2048"))
+DOCUMENT_PREFIX = "documents/sha256"
+
+metadata = MetaData(schema=SCHEMA_NAME)
+document_index = Table(
+    "document_index", metadata,
+    Column("document_fragment_id", String, primary_key=True),
+    Column("content_sha256", String(64), nullable=False, index=True),
+    Column("s3_key", String, nullable=False),
+    Column("size_bytes", BigInteger, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+
+def document_key(content_sha256, extension):
+    return f"{DOCUMENT_PREFIX}/{content_sha256[:2]}/{content_sha256}.{extension}"
+
+
+class DocumentStore:
+    """Content-addressed store for portal documents.
+
+    PDFs live once in S3 under documents/sha256/<ab>/<sha256>.pdf, with their extracted
+    text next to them as .txt, and a local disk copy under PDF_CACHE_DIR. The
+    document_index table maps each documentFragmentId to its content hash, so a
+    document seen on an earlier run is neither downloaded from the portal nor
+    uploaded or text-extracted again. The disk copy is capped at max_mb, evicting the
+    least recently written files first.
+    """
+
+    def __init__(self, engine, s3_client, bucket, cache_dir=PDF_CACHE_DIR, max_mb=PDF_CACHE_MAX_MB):
+        self.engine = engine
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._cache_bytes = sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file())
+        document_index.create(engine, checkfirst=True)
+
+    def local_path(self, content_sha256, extension):
+        return os.path.join(self.cache_dir, f"{content_sha256}.{extension}")
+
+    def lookup(self, document_fragment_id):
+        """Returns the index row (content_sha256, s3_key, ...) or None if the document is new"""
+        with self.engine.connect() as conn:
+            return conn.execute(
+                select(document_index).where(document_index.c.document_fragment_id == document_fragment_id)
+            ).first()
+
+    def put(self, document_fragment_id, content):
+        """Stores a freshly downloaded document and indexes it; returns (content_sha256, s3_key)"""
+        content_sha256 = hashlib.sha256(content).hexdigest()
+        s3_key = document_key(content_sha256, "pdf")
+        if not self._s3_exists(s3_key):
+            self.s3_client.put_object(Body=content, Bucket=self.bucket, Key=s3_key, ContentType="application/pdf")
+        self._write_local(self.local_path(content_sha256, "pdf"), content)
+        stmt = insert(document_index).values(
+            document_fragment_id=document_fragment_id,
+            content_sha256=content_sha256,
+            s3_key=s3_key,
+            size_bytes=len(content),
+            created_at=datetime.now(),
+        ).on_conflict_do_nothing(index_elements=["document_fragment_id"])
+        with self.engine.connect() as conn:
+            conn.execute(stmt)
+            conn.commit()
+        return content_sha256, s3_key
+
+    def get_pdf_path(self, content_sha256, s3_key):
+        """Local path of a stored PDF, fetching it from S3 into the disk cache if needed"""
+        path = self.local_path(content_sha256, "pdf")
+        try:
+            # Marks it recently used so eviction doesn't pull it from under the reader
+            os.utime(path)
+        except FileNotFoundError:
+            body = self.s3_client.get_object(Bucket=self.bucket, Key=s3_key)["Body"].read()
+            self._write_local(path, body)
+        return path
+
+    def get_text(self, content_sha256):
+        """Previously extracted text of a document, or None if it was never extracted"""
+        path = self.local_path(content_sha256, "txt")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        try:
+            body = self.s3_client.get_object(Bucket=self.bucket, Key=document_key(content_sha256, "txt"))["Body"].read()
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+        self._write_local(path, body)
+        return body.decode("utf-8")
+
+    def put_text(self, content_sha256, text):
+        data = text.encode("utf-8")
+        self.s3_client.put_object(
+            Body=data, Bucket=self.bucket, Key=document_key(content_sha256, "txt"), ContentType="text/plain; charset=utf-8"
+        )
+        self._write_local(self.local_path(content_sha256, "txt"), data)
+
+    def _s3_exists(self, key):
+        try:
+            self.s3_client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _write_local(self, path, data):
+        # Written under a temp name so a concurrent reader never sees a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._cache_bytes += len(data)
+            if self._cache_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.is_file() and not entry.name.endswith(".tmp")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        self._cache_bytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._cache_bytes <= self.max_bytes * 0.8:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._cache_bytes -= size
+            except FileNotFoundError:
+                pass
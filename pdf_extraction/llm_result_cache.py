@@ -0,0 +1,64 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, and_, select
+from sqlalchemy.dialects.postgresql import insert
+
+SCHEMA_NAME = os.getenv("SCHEMA", "vivid-dev-schema")
+
+metadata = MetaData(schema=SCHEMA_NAME)
+llm_results = Table(
+    "llm_results", metadata,
+    Column("content_sha256", String(64), primary_key=True),
+    Column("prompt_version", String(64), primary_key=True),
+    Column("prior_summary_sha256", String(64), primary_key=True),
+    Column("result", Text, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+)
+
+_table_lock = threading.Lock()
+_table_ready = False
+
+
+def ensure_llm_result_table(engine):
+    global _table_ready
+    with _table_lock:
+        if not _table_ready:
+            llm_results.create(engine, checkfirst=True)
+            _table_ready = True
+
+
+def summary_hash(summary):
+    """Stable hash of the summary merged so far; "" (no prior summary) hashes like any other value"""
+    data = json.dumps(summary, sort_keys=True) if isinstance(summary, dict) else ""
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def load_llm_result(engine, content_sha256, prompt_version, prior_summary_sha256):
+    """Returns the cached LLM JSON string for this document, prompt and prior summary, or None"""
+    ensure_llm_result_table(engine)
+    with engine.connect() as conn:
+        return conn.execute(
+            select(llm_results.c.result).where(and_(
+                llm_results.c.content_sha256 == content_sha256,
+                llm_results.c.prompt_version == prompt_version,
+                llm_results.c.prior_summary_sha256 == prior_summary_sha256,
+            ))
+        ).scalar()
+
+
+def save_llm_result(engine, content_sha256, prompt_version, prior_summary_sha256, result):
+    ensure_llm_result_table(engine)
+    stmt = insert(llm_results).values(
+        content_sha256=content_sha256,
+        prompt_version=prompt_version,
+        prior_summary_sha256=prior_summary_sha256,
+        result=result,
+        created_at=datetime.now(),
+    ).on_conflict_do_nothing(index_elements=["content_sha256", "prompt_version", "prior_summary_sha256"])
+    with engine.connect() as conn:
+        conn.execute(stmt)
+        conn.commit()
@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import urllib.parse
 from playwright.sync_api import sync_playwright
@@ -11,11 +12,17 @@ import os
 import re
 import glob
 import uuid
+import hashlib
 import sqlalchemy
 from sqlalchemy import create_engine, MetaData, Table, select, Column, update, String, MetaData, Date, Integer, Boolean, func, select, and_, or_, literal_column
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime, date
 import copy
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 
 from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
@@ -26,6 +33,10 @@ from langchain.text_splitter import CharacterTextSplitter
 from pydantic import BaseModel, Field
 from typing import List
 from logger_config import setup_logger
+from captcha_pool import CaptchaTokenPool
+from case_id_cache import load_case_ids, save_case_id, forget_case_id
+from document_store import DocumentStore
+from llm_result_cache import load_llm_result, save_llm_result, summary_hash
 
 SITE_URL = "https://portal-nc.tylertech.cloud/Portal/Home/Dashboard/29"
 BUCKET_NAME = os.getenv("BUCKET_NAME", "") 
@@ -49,6 +60,15 @@ RECIPIENT_EMAIL = "vigneshkumar@meyicloud.com"
 secrets_manager_session = boto3.client("secretsmanager", region_name="us-east-1")
 SECRET_ARN = os.getenv("SecretArn", "arn:aws:secretsmanager:us-east-1:491085409841:secret:vivid/dev/secret-credentials-v1eKvA")
 
+# Documents of one case downloaded and stored ahead of the text and ChatGPT steps
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", "4"))
+DOWNLOAD_TIMEOUT_SECONDS = int(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "120"))
+# PyMuPDF is not thread-safe, so every fitz call in the process goes through this lock
+FITZ_LOCK = threading.Lock()
+# Most CAPTCHA tokens ready or being solved at once, and how many queued cases ahead
+# they are solved for; 0 means one per case worker
+CAPTCHA_POOL_SIZE = int(os.getenv("CAPTCHA_POOL_SIZE", "0"))
+
 FILE_KEYWORDS = [
     "affidavit of service", "service affidavit", "note", "promissory note", "aos",
     "foreclosure notice of hearing", "notice of hearing", "notice of foreclosure sale", "nos",
@@ -111,30 +131,12 @@ def solve_captcha():
             elif solution_data.get("request") == "CAPCHA_NOT_READY":
                 continue
             else:
-                exit()
+                return False, f"Failed to solve captcha: {solution_data}"
         return False, f"Failed to solve captcha: {solution_data}"
     except Exception as e:
         logger.error(f"Have issue in solve_captcha function...! {e}")
         return False, e
 
-def upload_to_s3(file_content, case_number, file_name, date):
-    s3_client = boto3.client('s3', region_name="us-east-1")
-    current_date = datetime.now().strftime("%Y_%m_%d")
-    document_date = date.replace("/", "_")
-    odyssey_id = case_number[-3:]
-    folder_path = f"case_details/{current_date}/{odyssey_id}/{case_number}/{document_date}_{file_name}.pdf"
-    try:
-        s3_client.put_object(
-            Body=file_content,
-            Bucket=BUCKET_NAME,
-            Key=folder_path,
-            ContentType='application/pdf'
-        )
-        logger.info(f"Successfully uploaded {file_name} to S3")
-        return folder_path
-    except ClientError as e:
-        logger.error(f"Error uploading to S3: {e}")
-
 def construct_download_url(case_number, event_data):
     base_url = "https://portal-nc.tylertech.cloud/Portal/DocumentViewer/DisplayDoc"
     encoded_doc_name = urllib.parse.quote(event_data['documentName'][0]) if event_data['documentName'] else ""
@@ -151,6 +153,69 @@ def construct_download_url(case_number, event_data):
     }
     return f"{base_url}?{urllib.parse.urlencode(params)}"
 
+def create_http_session():
+    """Keep-alive session for the portal, with a pool sized for the document downloads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=DOWNLOAD_CONCURRENCY)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def fetch_document(http_session, document_store, case_number, event):
+    """Returns (content_sha256, s3_key, pdf_text) for one document; pdf_text is None
+    unless the document's text was extracted on an earlier run.
+
+    Documents already in the store (by documentFragmentId) are not downloaded again;
+    new ones are downloaded and stored once under their content hash. Text extraction
+    is left to extract_document_text.
+    """
+    file_name = event['documentName'][0]
+    pdf_text = None
+    indexed = document_store.lookup(event['documentFragmentId'][0])
+    if indexed:
+        content_sha256, s3_key = indexed.content_sha256, indexed.s3_key
+        logger.info(f"[PDF CACHED]: {file_name} -> {content_sha256}")
+        pdf_text = document_store.get_text(content_sha256)
+    else:
+        download_url = construct_download_url(case_number, event)
+        pdf_response = http_session.get(download_url, timeout=DOWNLOAD_TIMEOUT_SECONDS)
+        if pdf_response.status_code != 200:
+            logger.error(f"Failed to download PDF: {pdf_response.status_code}")
+            raise ValueError(f"FAILED TO DOWNLOAD PDF")
+        content_sha256, s3_key = document_store.put(event['documentFragmentId'][0], pdf_response.content)
+        logger.info(f"[PDF DOWNLOADED]: {file_name}")
+    return content_sha256, s3_key, pdf_text
+
+def extract_document_text(document_store, content_sha256, s3_key):
+    """Extracts a stored document's text with fitz or Textract and stores it for later runs"""
+    # Re-fetched from S3 if the disk cache evicted it since the download
+    pdf_path = document_store.get_pdf_path(content_sha256, s3_key)
+    pdf_text = extract_pdf_text(pdf_path, s3_key)
+    if pdf_text is not None:
+        document_store.put_text(content_sha256, pdf_text)
+    return pdf_path, pdf_text
+
+def prefetch_documents(http_session, document_store, case_number, events):
+    """Yields (event, content_sha256, file_path, pdf_text) in the order of events.
+
+    Up to DOWNLOAD_CONCURRENCY documents are downloaded and stored ahead of the
+    consumer, so their network and S3 time overlaps with the ChatGPT step of earlier
+    documents. Text extraction runs here, in the consumer's thread, when a document's
+    turn comes. A failed document raises when its turn comes; closing the generator
+    early cancels the documents not started yet without waiting for the running ones.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, DOWNLOAD_CONCURRENCY))
+    futures = [executor.submit(fetch_document, http_session, document_store, case_number, event) for event in events]
+    try:
+        for event, future in zip(events, futures):
+            content_sha256, s3_key, pdf_text = future.result()
+            file_path = document_store.local_path(content_sha256, "pdf")
+            if pdf_text is None:
+                file_path, pdf_text = extract_document_text(document_store, content_sha256, s3_key)
+            yield event, content_sha256, file_path, pdf_text
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 def extract_event_details(response_data, case_number):
     case_id = response_data['CaseId']
     events = response_data['Events']
@@ -193,13 +258,14 @@ def inject_captcha(page, token):
     return True
 
 def pdf_has_images(pdf_path):
-    doc = fitz.open(pdf_path)
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        images = page.get_images(full=True)
-        if images:
-            return True
-    return False
+    with FITZ_LOCK:
+        doc = fitz.open(pdf_path)
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            images = page.get_images(full=True)
+            if images:
+                return True
+        return False
 
 def extract_pdf_text(pdf_path, s3_key):
     if pdf_has_images(pdf_path):
@@ -210,11 +276,12 @@ def extract_pdf_text(pdf_path, s3_key):
         return extract_text_with_fitz(pdf_path)
 
 def extract_text_with_fitz(pdf_path):
-    doc = fitz.open(pdf_path)
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-    return full_text
+    with FITZ_LOCK:
+        doc = fitz.open(pdf_path)
+        full_text = ""
+        for page in doc:
+            full_text += page.get_text()
+        return full_text
 
 def extract_text_with_textract(s3_key):
     try:
@@ -290,14 +357,8 @@ def dict_to_structured_text(data, indent=0):
         lines.append(f"{spacing}{data}")
     return "\n".join(lines)
 
-def process_text_with_chatgpt(text, chatgpt_summary=""):
-    try:
-        if isinstance(chatgpt_summary, dict):
-            previous_json = "Previous extracted data:\n" + dict_to_structured_text(chatgpt_summary)
-        else:
-            previous_json = ""
-        logger.info(f"Total counts of extracted text: {len(text)}")
-        base_prompt = """  
+CHAT_MODEL_NAME = "gpt-4-turbo"
+EXTRACTION_PROMPT = """  
                 You are a foreclosure PDF analysis assistant. Extract structured info from legal documents into clean double-quoted JSON. Never guess missing values. Leave blank if not found. Always follow this logic:   
                 ==========  
                 FILTERING  
@@ -424,13 +485,23 @@ def process_text_with_chatgpt(text, chatgpt_summary=""):
                   "red_flag_reason": "",  
                   "active_indicator": true/false  
                 }}}}  
-                """ 
-        full_prompt = base_prompt.format(previous_json=previous_json)
+                """
+# Cached LLM results are keyed on this, so editing the prompt or model invalidates them
+PROMPT_VERSION = hashlib.sha256(f"{CHAT_MODEL_NAME}\n{EXTRACTION_PROMPT}".encode("utf-8")).hexdigest()[:16]
+
+def process_text_with_chatgpt(text, chatgpt_summary="", session_id="default-session"):
+    try:
+        if isinstance(chatgpt_summary, dict):
+            previous_json = "Previous extracted data:\n" + dict_to_structured_text(chatgpt_summary)
+        else:
+            previous_json = ""
+        logger.info(f"Total counts of extracted text: {len(text)}")
+        full_prompt = EXTRACTION_PROMPT.format(previous_json=previous_json)
         prompt = PromptTemplate(
             input_variables=["text"],
             template=full_prompt + "\n{text}"
         )
-        chat_model = ChatOpenAI(model_name="gpt-4-turbo", openai_api_key=OPENAI_API_KEY)
+        chat_model = ChatOpenAI(model_name=CHAT_MODEL_NAME, openai_api_key=OPENAI_API_KEY)
         chain = prompt | chat_model
         chain_with_memory = RunnableWithMessageHistory(
             chain,
@@ -440,7 +511,7 @@ def process_text_with_chatgpt(text, chatgpt_summary=""):
         )
         response = chain_with_memory.invoke(
             {"text": text},
-            config={"configurable": {"session_id": "default-session"}}
+            config={"configurable": {"session_id": session_id}}
         )
         logger.info(f"ChatGPT Response:, {response.content}")
         if response.content:
@@ -461,6 +532,18 @@ def process_text_with_chatgpt(text, chatgpt_summary=""):
         logger.error(f"Langchain error: {e}")
         return None
 
+def summarize_document(engine, content_sha256, text, chatgpt_summary, session_id):
+    """process_text_with_chatgpt, cached per (document, PROMPT_VERSION, summary so far)"""
+    prior_summary_sha256 = summary_hash(chatgpt_summary)
+    cached = load_llm_result(engine, content_sha256, PROMPT_VERSION, prior_summary_sha256)
+    if cached is not None:
+        logger.info(f"[LLM RESULT CACHED]: {content_sha256}")
+        return cached
+    result = process_text_with_chatgpt(text, chatgpt_summary, session_id=session_id)
+    if result is not None:
+        save_llm_result(engine, content_sha256, PROMPT_VERSION, prior_summary_sha256, result)
+    return result
+
 def get_case_numbers(engine):
     try:
         """Fetch case_number where document_pull_recommended is True"""
@@ -569,6 +652,238 @@ def update_case_intake_red_flag(engine, final_results, case_number):
         logger.error(f"Failed to update case_intake for {case_number}: {e}")
         return False, f"Failed to update case_intake: {str(e)}"
 
+def get_case_worker_count():
+    """Number of browser workers, defaults to the Batch container vCPUs"""
+    try:
+        return max(1, int(float(os.getenv("CASE_WORKERS", os.cpu_count() or 1))))
+    except ValueError:
+        return 1
+
+class PortalUnavailable(Exception):
+    """The worker's browser or its CAPTCHA could not be started; the case is requeued, not failed"""
+
+class PortalBrowser:
+    """One worker's Playwright browser, started on the first case that needs a portal search.
+
+    Cases whose portal case id is already cached never touch it, so a run made up
+    of cached cases launches no browser and uses no CAPTCHA.
+    """
+
+    def __init__(self, captcha_pool):
+        self.captcha_pool = captcha_pool
+        self.playwright = None
+        self.browser = None
+        self.page = None
+
+    def get_page(self):
+        if self.page is None:
+            captcha_token, captcha_msg = self.captcha_pool.get()
+            if captcha_token == False:
+                raise PortalUnavailable(captcha_msg)
+            try:
+                if self.browser is None:
+                    # Playwright's sync API is bound to the thread that started it, so every worker starts its own
+                    self.playwright = sync_playwright().start()
+                    self.browser = self.playwright.chromium.launch(headless=True)
+                context = self.browser.new_context()
+                page = context.new_page()
+                page.goto(SITE_URL)
+            except Exception as e:
+                raise PortalUnavailable(f"Could not start the portal browser: {e}") from e
+            page.evaluate(f"""
+            document.querySelector('[name="g-recaptcha-response"]').value = '{captcha_token}';
+            document.querySelector('[name="g-recaptcha-response"]').dispatchEvent(new Event('change', {{ bubbles: true }}));
+            """)
+            time.sleep(3)
+            self.page = page
+        return self.page
+
+    def close(self):
+        if self.browser:
+            self.browser.close()
+        if self.playwright:
+            self.playwright.stop()
+
+def search_case_id(page, case_number, captcha_pool):
+    """Searches the portal for the case and reads its id off the case link; None if the CAPTCHA could not be injected"""
+    time.sleep(3)
+    captcha_token, captcha_msg = captcha_pool.get(key=case_number)
+    inject_captcha(page, captcha_token)
+    page.fill("#caseCriteria_SearchCriteria", case_number)
+    time.sleep(2)
+    page.click("#btnSSSubmit")
+    time.sleep(3)
+    try:
+        case_link = page.locator("a.caseLink").first
+        case_link.wait_for(timeout=30000)
+        logger.info("CASE LINK FOUND!")
+        page.click("a.caseLink")
+    except Exception as e:
+        logger.info("[CASE LINK NOT FOUND], Debugging page content...")
+        logger.info(f"Exception in caseLink Click via Playwright: {e}")
+        logger.info("Trying to solve CAPTCHA again...")
+        captcha_token, captcha_msg = captcha_pool.get()
+        if not inject_captcha(page, captcha_token):
+            logger.info("[CAPTCHA EXPIRED]! Retrying new captcha...")
+            return None
+        page.fill("#caseCriteria_SearchCriteria", case_number)
+        time.sleep(2)
+        page.click("#btnSSSubmit")
+        time.sleep(3)
+        try:
+            case_link = page.locator("a.caseLink").first
+            case_link.wait_for(timeout=40000)
+            logger.info("[CASE LINK NOT FOUND!] Clicking...")
+            case_link.click()
+        except Exception as e:
+            logger.error(f" [COULD NOT FIND THE CASE LINK FOR] : {case_number}. Skipping...")
+            raise ValueError(f"Still couldn't find case link for this {case_number}.")
+    data_url = page.get_attribute("a.caseLink", "data-url")
+    parsed_url = urllib.parse.parse_qs(urllib.parse.urlparse(data_url).query)
+    return parsed_url.get("id", [""])[0]
+
+def fetch_case_events(http_session, case_id):
+    api_url = f"https://portal-nc.tylertech.cloud/app/RegisterOfActionsService/CaseEvents('{case_id}')?mode=portalembed&$top=50&$skip=0"
+    return http_session.get(api_url, timeout=DOWNLOAD_TIMEOUT_SECONDS)
+
+def process_case(browser, case_number, cached_case_id, engine, case_intake, http_session, document_store, failed_cases, worker_name):
+    """Resolves the case id (from the cache, else the portal search) and extracts the case's documents.
+
+    Failures are recorded, not raised, except PortalUnavailable, which says nothing
+    about the case itself.
+    """
+    page = None
+    try:
+        logger.info(f"[{worker_name}] Processing Case: {case_number}")
+        case_id = cached_case_id
+        response = None
+        if case_id:
+            logger.info(f"[CASE ID CACHED]: {case_number} -> {case_id}, skipping the portal search")
+            response = fetch_case_events(http_session, case_id)
+            # Only a definitive not-found evicts the id; other errors fail the case below and keep it
+            if response.status_code == 404:
+                logger.info(f"[CACHED CASE ID REJECTED]: {response.status_code}, searching the portal again")
+                forget_case_id(engine, case_number)
+                case_id = None
+        if not case_id:
+            page = browser.get_page()
+            case_id = search_case_id(page, case_number, browser.captcha_pool)
+            if case_id is None:
+                return
+            if case_id:
+                save_case_id(engine, case_number, case_id)
+                response = fetch_case_events(http_session, case_id)
+        if case_id:
+            if response.status_code == 200:
+                response_data = response.json()
+                events = extract_event_details(response_data, case_number)
+                logger.info(f"[PDF EVENTS]: {events}")
+                logger.info(f"[PDF EVENTS COUNTS]: {len(events)}")
+                if not events:
+                    raise ValueError(f"PDF DOCUMENTS NOT EXIST")
+                filtered_events = filter_documents(events, case_number)
+                logger.info("\n[FILTERED DOCUMENT NAMES]:")
+                logger.info(f"{filtered_events} '\n','[FILTERED DOCUMENT COUNTS]:' {len(filtered_events)}")
+                if not filtered_events:
+                    raise ValueError(f"REQUIRED PDF DOCUMENTS NOT EXIST")
+                all_pdfs = []
+                final_results = {}
+                chatgpt_summary = ""
+                with closing(prefetch_documents(http_session, document_store, case_number, list(reversed(filtered_events)))) as documents:
+                    for event, content_sha256, file_path, pdf_text in documents:
+                        file_name = event['documentName'][0]
+                        all_pdfs.append(file_path)
+                        if pdf_text is None:
+                            raise ValueError("CANNOT EXTRACT TEXT WITH TEXTRACT")
+                        if pdf_text.strip():
+                            chatgpt_summary = json.loads(summarize_document(engine, content_sha256, pdf_text, chatgpt_summary, worker_name))
+                            if chatgpt_summary is None:
+                                raise ValueError("CANNOT EXTRACT DETAILS FROM ChatGPT")
+                            if chatgpt_summary.get("red_flag") == "Yes":
+                                db_success, msg = update_case_intake_red_flag(engine, chatgpt_summary, case_number)
+                                if not db_success:
+                                    raise ValueError(str(msg))
+                                logger.info(f"Red flag detected, stopping further PDF processing for {case_number}")
+                                break
+                        else:
+                            logger.error(f"Failed to extract text from PDF: {file_name}")
+                            raise ValueError(f"FAILED TO EXTRACT TEXT FROM PDF")
+                if chatgpt_summary.get("red_flag") != "Yes":
+                    final_results = chatgpt_summary
+                    db_success, msg = insert_final_result(engine, final_results, case_number)
+                    if not db_success:
+                        raise ValueError(str(msg))
+                    if db_success:
+                        logger.info(msg)
+                if page:
+                    time.sleep(2)
+                    page.go_back()
+                logger.info(f"\nEXTRACTION SUCCESSFUL! FOR THE CASE NUMBER {case_number}")
+            else:
+                logger.error(f"[API REQUEST FAILED]: {response.status_code}")
+                raise ValueError(f"PDF API REQUEST FAILED")
+    except PortalUnavailable:
+        raise
+    except Exception as e:
+        logger.error(f"[EXTRACTION FAILED FOR THE CASE NUMBER:] {case_number}: {e}")
+        failed_cases.append({"case_number": case_number, "error": str(e)})
+        try:
+            update_stmt = update(case_intake).where(
+                case_intake.c.case_number == case_number).values(
+                parse_failed=True, last_updated_at=datetime.now(), parse_failed_reason=str(e))
+            with engine.connect() as conn:
+                conn.execute(update_stmt)
+                conn.commit()
+                logger.info(f" 'parse_failed' updated to True in DB for {case_number}")
+        except Exception as db_err:
+            logger.error(f" Failed to update 'parse_failed' in DB for {case_number}: {db_err}")
+        if page:
+            time.sleep(2)
+            page.go_back()
+
+def take_case(case_queue, case_ids, captcha_pool):
+    """Next case number off the shared queue, or None once it is empty.
+
+    Reserves CAPTCHA tokens for the uncached cases among it and the next few queued,
+    so they are solved while earlier cases are still being processed.
+    """
+    try:
+        case_number = case_queue.get_nowait()
+    except queue.Empty:
+        return None
+    with case_queue.mutex:
+        upcoming = list(itertools.islice(case_queue.queue, captcha_pool.size))
+    captcha_pool.reserve(number for number in [case_number] + upcoming if number not in case_ids)
+    return case_number
+
+def run_case_worker(worker_id, case_queue, case_ids, engine, case_intake, captcha_pool, document_store, failed_cases):
+    """Takes case numbers off the shared queue until it is empty, with its own browser, CAPTCHA and HTTP state.
+
+    If its browser cannot be started the case goes back on the queue for the other
+    workers and this worker stops.
+    """
+    worker_name = f"worker-{worker_id}"
+    http_session = create_http_session()
+    browser = PortalBrowser(captcha_pool)
+    try:
+        while True:
+            case_number = take_case(case_queue, case_ids, captcha_pool)
+            if case_number is None:
+                break
+            try:
+                process_case(browser, case_number, case_ids.get(case_number), engine, case_intake, http_session, document_store, failed_cases, worker_name)
+            except PortalUnavailable as e:
+                logger.error(f"[{worker_name}] [PORTAL UNAVAILABLE]: {e}, requeueing {case_number} and stopping")
+                case_queue.put(case_number)
+                raise
+            finally:
+                # A search that failed before asking for its token must not keep one refreshed
+                captcha_pool.release(case_number)
+    finally:
+        browser.close()
+        http_session.close()
+    logger.info(f"[{worker_name}] NO CASES LEFT IN THE QUEUE")
+
 def extract_data():
     engine = get_db_connection()
     metadata = MetaData(schema=SCHEMA_NAME)
@@ -582,156 +897,45 @@ def extract_data():
     )
     Failed_cases = []
     case_numbers = None
+    captcha_pool = None
     try:
         case_numbers = get_case_numbers(engine)
         if not case_numbers:
             raise ValueError(f"[CASE NUMBERS NOT EXISTED] FOR THE CURRENT DATE {date.today()}!")
-        for i in range(2):
-            captcha_token, captcha_msg = solve_captcha()
-            if captcha_token:
-                break
-        if captcha_token == False:
-            raise ValueError(captcha_msg)
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context()
-            page = context.new_page()
-            page.goto(SITE_URL)
-            page.evaluate(f"""
-            document.querySelector('[name="g-recaptcha-response"]').value = '{captcha_token}';
-            document.querySelector('[name="g-recaptcha-response"]').dispatchEvent(new Event('change', {{ bubbles: true }}));
-            """)
-            time.sleep(3)
-            for case_number in case_numbers:
+        case_queue = queue.Queue()
+        for case_number in case_numbers:
+            case_queue.put(case_number)
+        worker_count = min(get_case_worker_count(), len(case_numbers))
+        logger.info(f"[CASE WORKERS]: {worker_count}")
+        case_ids = load_case_ids(engine, case_numbers)
+        logger.info(f"[CACHED CASE IDS]: {len(case_ids)} OF {len(case_numbers)}")
+        # Shared by the workers; PDFs are kept on disk under PDF_CACHE_DIR up to PDF_CACHE_MAX_MB
+        document_store = DocumentStore(engine, boto3.client('s3', region_name="us-east-1"), BUCKET_NAME)
+        # Solves only start for reserved or waiting searches, so an all-cached run pays for none
+        captcha_pool = CaptchaTokenPool(solve_captcha, CAPTCHA_POOL_SIZE or worker_count).start()
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            futures = [
+                executor.submit(run_case_worker, worker_id, case_queue, case_ids, engine, case_intake, captcha_pool, document_store, Failed_cases)
+                for worker_id in range(worker_count)
+            ]
+            worker_errors = []
+            for future in futures:
                 try:
-                    logger.info(f"Processing Case: {case_number}")
-                    time.sleep(3)
-                    captcha_token, captcha_msg = solve_captcha()
-                    inject_captcha(page, captcha_token)
-                    page.fill("#caseCriteria_SearchCriteria", case_number)
-                    time.sleep(2)
-                    page.click("#btnSSSubmit")
-                    time.sleep(3)
-                    try:
-                        case_link = page.locator("a.caseLink").first
-                        case_link.wait_for(timeout=30000)
-                        logger.info("CASE LINK FOUND!")
-                        page.click("a.caseLink")
-                    except Exception as e:
-                        logger.info("[CASE LINK NOT FOUND], Debugging page content...")
-                        logger.info(f"Exception in caseLink Click via Playwright: {e}")
-                        logger.info("Trying to solve CAPTCHA again...")
-                        captcha_token, captcha_msg = solve_captcha()
-                        if not inject_captcha(page, captcha_token):
-                            logger.info("[CAPTCHA EXPIRED]! Retrying new captcha...")
-                            continue
-                        page.fill("#caseCriteria_SearchCriteria", case_number)
-                        time.sleep(2)
-                        page.click("#btnSSSubmit")
-                        time.sleep(3)
-                        try:
-                            case_link = page.locator("a.caseLink").first
-                            case_link.wait_for(timeout=40000)
-                            logger.info("[CASE LINK NOT FOUND!] Clicking...")
-                            case_link.click()
-                        except Exception as e:
-                            logger.error(f" [COULD NOT FIND THE CASE LINK FOR] : {case_number}. Skipping...")
-                            raise ValueError(f"Still couldn't find case link for this {case_number}.")
-                    data_url = page.get_attribute("a.caseLink", "data-url")
-                    parsed_url = urllib.parse.parse_qs(urllib.parse.urlparse(data_url).query)
-                    case_id = parsed_url.get("id", [""])[0]
-                    if case_id:
-                        api_url = f"https://portal-nc.tylertech.cloud/app/RegisterOfActionsService/CaseEvents('{case_id}')?mode=portalembed&$top=50&$skip=0"
-                        response = requests.get(api_url)
-                        if response.status_code == 200:
-                            response_data = response.json()
-                            events = extract_event_details(response_data, case_number)
-                            logger.info(f"[PDF EVENTS]: {events}")
-                            logger.info(f"[PDF EVENTS COUNTS]: {len(events)}")
-                            if not events:
-                                raise ValueError(f"PDF DOCUMENTS NOT EXIST")
-                            filtered_events = filter_documents(events, case_number)
-                            logger.info("\n[FILTERED DOCUMENT NAMES]:")
-                            logger.info(f"{filtered_events} '\n','[FILTERED DOCUMENT COUNTS]:' {len(filtered_events)}")
-                            if not filtered_events:
-                                raise ValueError(f"REQUIRED PDF DOCUMENTS NOT EXIST")
-                            all_pdfs = []
-                            final_results = {}
-                            chatgpt_summary = ""
-                            for event in reversed(filtered_events):
-                                download_url = construct_download_url(case_number, event)
-                                pdf_response = requests.get(download_url)
-                                if pdf_response.status_code == 200:
-                                    file_name = event['documentName'][0]
-                                    s3_key = upload_to_s3(pdf_response.content, case_number, file_name, event['date'])
-                                    safe_filename = re.sub(r'[\\/:"*?<>|]+', '_', event['documentName'][0])
-                                    file_name = f"{case_number}_{safe_filename}".replace(".pdf", "") + ".pdf"
-                                    file_path = f"./{file_name}"
-                                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                                    with open(file_path, "wb") as pdf_file:
-                                        pdf_file.write(pdf_response.content)
-                                    all_pdfs.append(file_path)
-                                    pdf_text = extract_pdf_text(file_path, s3_key)
-                                    if pdf_text is None:
-                                        raise ValueError("CANNOT EXTRACT TEXT WITH TEXTRACT")
-                                    if pdf_text.strip():
-                                        chatgpt_summary = json.loads(process_text_with_chatgpt(pdf_text, chatgpt_summary))
-                                        if chatgpt_summary is None:
-                                            raise ValueError("CANNOT EXTRACT DETAILS FROM ChatGPT")
-                                        if chatgpt_summary.get("red_flag") == "Yes":
-                                            db_success, msg = update_case_intake_red_flag(engine, chatgpt_summary, case_number)
-                                            if not db_success:
-                                                raise ValueError(str(msg))
-                                            logger.info(f"Red flag detected, stopping further PDF processing for {case_number}")
-                                            break
-                                    else:
-                                        logger.error(f"Failed to extract text from PDF: {file_name}")
-                                        raise ValueError(f"FAILED TO EXTRACT TEXT FROM PDF")
-                                else:
-                                    logger.error(f"Failed to download PDF: {pdf_response.status_code}")
-                                    raise ValueError(f"FAILED TO DOWNLOAD PDF")
-                            if chatgpt_summary.get("red_flag") != "Yes":
-                                final_results = chatgpt_summary
-                                db_success, msg = insert_final_result(engine, final_results, case_number)
-                                if not db_success:
-                                    raise ValueError(str(msg))
-                                if db_success:
-                                    logger.info(msg)
-                            for pdf_file in glob.glob("*.pdf"):
-                                try:
-                                    os.remove(pdf_file)
-                                    logger.info(f"\n[PDF REMOVED]: {pdf_file}")
-                                except Exception as e:
-                                    logger.error(f"[ERROR IN REMOVING PDF] {pdf_file}: {e}")
-                            time.sleep(2)
-                            page.go_back()
-                            logger.info(f"\nEXTRACTION SUCCESSFUL! FOR THE CASE NUMBER {case_number}")
-                        else:
-                            logger.error(f"[API REQUEST FAILED]: {response.status_code}")
-                            raise ValueError(f"PDF API REQUEST FAILED")
-                except Exception as e:
-                    logger.error(f"[EXTRACTION FAILED FOR THE CASE NUMBER:] {case_number}: {e}")
-                    Failed_cases.append({"case_number": case_number, "error": str(e)})
-                    try:
-                        update_stmt = update(case_intake).where(
-                            case_intake.c.case_number == case_number).values(
-                            parse_failed=True, last_updated_at=datetime.now(), parse_failed_reason=str(e))
-                        with engine.connect() as conn:
-                            conn.execute(update_stmt)
-                            conn.commit()
-                            logger.info(f" 'parse_failed' updated to True in DB for {case_number}")
-                    except Exception as db_err:
-                        logger.error(f" Failed to update 'parse_failed' in DB for {case_number}: {db_err}")
-                    for pdf_file in glob.glob("*.pdf"):
-                        try:
-                            os.remove(pdf_file)
-                            logger.info(f"\n[PDF REMOVED]: {pdf_file}")
-                        except Exception as e:
-                            logger.error(f"[ERROR IN REMOVING PDF] {pdf_file}: {e}")
-                    time.sleep(2)
-                    page.go_back()
+                    future.result()
+                except Exception as worker_err:
+                    logger.error(f"[CASE WORKER FAILED]: {worker_err}")
+                    worker_errors.append(worker_err)
+        if not case_queue.empty():
+            # Requeued by a worker that could not start its browser after the others had finished
+            logger.error(f"[CASES LEFT UNPROCESSED]: {list(case_queue.queue)}")
+        # Cases of a failed worker are picked up by the others; only a total failure is an error
+        if len(worker_errors) == worker_count:
+            raise worker_errors[0]
     except Exception as e:
         logger.error(f"[EXTRACTION FAILED IN extract_data FUNCTION]: {e}")
+    finally:
+        if captcha_pool:
+            captcha_pool.stop()
     return {"failed_cases": Failed_cases}
 
 def insert_final_result(engine, final_results, case_number):